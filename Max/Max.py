@@ -1,14 +1,31 @@
 import streamlit as st
+import logging
+import os
+import time
+import uuid
+from collections import deque
 from datetime import datetime
-from Max.Max_Data_IN import load_data, get_filtered_data, get_final_df, build_container_map
+from Max.Max_Batch_Scan import read_codes, resolve_batch, summarize_batch
+from Max.Max_Data_IN import fetch_packing_lists, load_packing_list, load_versioned_data, read_packing_lists
+from Max.Max_Metrics import METRICS_DIR, RECORDER, profile_call, record_since, timed
+from Max.Max_Scan_Engine import SCAN_SERVER_PORT, ScanEngine, ScanServer
+from Max.Max_Scan_Index import ScanIndex
+from Max.Max_Scan_Ledger import LEDGER_PATH, ScanLedger
+from Max.Max_Snapshot import REFRESH_INTERVAL_SECONDS, SnapshotRefresher, SnapshotStore
+from Max.Max_Summary import PAGE_SIZE, STATUS_FILTERS
 
 # Constants
 STATUS_COLORS = {
     "success": "#27ae60", 
     "danger": "#c0392b", 
     "ready": "#3498db", 
-    "mixed": "#9b59b6"
+    "mixed": "#9b59b6",
+    "warning": "#e67e22"
 }
+# Recent scans kept in the session and shown in the UI
+SCAN_HISTORY_LIMIT = 10
+
+logger = logging.getLogger(__name__)
 
 @st.cache_data
 def get_page_styles():
@@ -55,92 +72,157 @@ def init_session_state():
     """Initialize session state variables with defaults."""
     defaults = {
         "scan_text": "",
-        "scan_history": [],
+        "scan_history": deque(maxlen=SCAN_HISTORY_LIMIT),
         "last_scan_status": "READY TO SCAN",
         "status_type": "ready",
         "scanned_pallet_no": None,
-        "last_item_display": None
+        "last_item_display": None,
+        "last_scan_code": None,
+        "suggested_c_inv": None,
+        "scan_candidates": ()
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
+@st.cache_resource
+def get_snapshot_store():
+    """Return the packing-list snapshot store shared by all sessions."""
+    return SnapshotStore()
+
+@st.cache_resource
+def get_snapshot_refresher():
+    """Start the background refresher that keeps the shared snapshot current."""
+    return SnapshotRefresher(
+        get_snapshot_store(), fetch_packing_lists, read_packing_lists, REFRESH_INTERVAL_SECONDS
+    ).start()
+
+def adopt_latest_snapshot(latest):
+    """Move the session onto a newer snapshot at the start of a rerun."""
+    pinned = st.session_state.snapshot
+    if latest is None or latest is pinned:
+        return
+    st.session_state.snapshot = latest
+
+    # Scan state survives unless the selected invoice's rows changed
+    c_inv = st.session_state.get("last_selected_c_inv")
+    if c_inv is None or pinned.fingerprints.get(c_inv) == latest.fingerprints.get(c_inv):
+        return
+    if c_inv not in latest.fingerprints:
+        st.session_state.pop("c_inv_select", None)
+    st.session_state.last_selected_c_inv = None
+    st.toast(f"C-INV {c_inv} was updated from SharePoint")
+
+@st.cache_resource
+def get_scan_ledger():
+    """Return the durable scan ledger shared by all sessions."""
+    return ScanLedger(LEDGER_PATH)
+
+@st.cache_resource
+def get_scan_engine():
+    """Return the scan engine shared by this page and the local scan endpoint."""
+    engine = ScanEngine(get_snapshot_store(), get_scan_ledger())
+    if SCAN_SERVER_PORT:
+        try:
+            ScanServer(engine).start()
+        except OSError:
+            # Scanning in the page does not need the endpoint
+            logger.exception("Scan endpoint could not start; running without it")
+    return engine
+
+def get_station():
+    """Return this station's ID, kept in the URL so a browser refresh resumes it."""
+    station = st.query_params.get("station")
+    if not station:
+        station = uuid.uuid4().hex[:8]
+        st.query_params["station"] = station
+    return station
+
+@timed("load_max_data")
 def load_max_data():
-    """Load and cache main data."""
-    if "max_data" not in st.session_state:
+    """Load the shared packing-list snapshot and pin it to this session."""
+    store = get_snapshot_store()
+    if "snapshot" not in st.session_state:
         with st.spinner("Loading data from SharePoint..."):
-            data = load_data()
+            snapshot = store.get(load_versioned_data)
             
             # Check if data loaded successfully
-            if data is None:
+            if snapshot is None:
                 st.error("❌ Failed to load data. Please check SharePoint connection.")
                 st.stop()  # Stop execution if no data
                 
-            # Ensure it's a DataFrame
-            if isinstance(data, tuple):
-                data = data[0]
-                
-            st.session_state.max_data = data
-    return st.session_state.max_data
+            st.session_state.snapshot = snapshot
+    else:
+        adopt_latest_snapshot(store.current)
+    get_snapshot_refresher()
+    return st.session_state.snapshot
+
+def prefetch_max_data():
+    """Load the shared snapshot and the first C-INV before any session opens the page.
+
+    Runs on a background thread started from the landing page, so it draws
+    nothing; on failure the page loads (and reports errors) as usual.
+    """
+    start = time.perf_counter()
+    try:
+        snapshot = get_snapshot_store().get(load_packing_list)
+        if snapshot.c_inv_list:
+            # The C-INV selectbox opens on the first invoice
+            snapshot.get_invoice(snapshot.c_inv_list[0])
+        get_snapshot_refresher()
+        get_scan_engine()
+    except Exception:
+        logger.exception("Packing list prefetch failed")
+        return
+    record_since("prefetch load", start)
+
+def get_invoice():
+    """Return the shared artifacts for the session's selected C-INV."""
+    return st.session_state.snapshot.get_invoice(st.session_state.last_selected_c_inv)
 
-def get_c_inv_list(main_df):
-    """Get cached C-INV list."""
-    if "c_inv_list" not in st.session_state:
-        st.session_state.c_inv_list = sorted(main_df["C-INVC-NO"].dropna().unique())
-    return st.session_state.c_inv_list
+def get_progress():
+    """Return the scan progress shared by every station on the selected C-INV."""
+    return get_scan_engine().progress(st.session_state.snapshot, st.session_state.last_selected_c_inv)
 
 
-def update_filtered_data(selected_c_inv, main_df):
+@timed("update_filtered_data")
+def update_filtered_data(selected_c_inv, snapshot):
     """Update filtered data when C-INV changes."""
     if (st.session_state.get("last_selected_c_inv") != selected_c_inv):
         with st.spinner("Processing data..."):
-            st.session_state.filtered_df = get_filtered_data(selected_c_inv, main_df)
-            st.session_state.final_df = get_final_df(st.session_state.filtered_df)
-            st.session_state.container_map = build_container_map(st.session_state.filtered_df)
+            snapshot.get_invoice(selected_c_inv)
             st.session_state.last_selected_c_inv = selected_c_inv
             
-            # Reset scan state
-            st.session_state.update({
-                "scan_history": [],
-                "last_scan_status": "READY TO SCAN",
-                "status_type": "ready",
-                "scanned_pallet_no": None,
-                "last_item_display": None
-            })
-
-def find_container_info(code, filtered_df):
-    """Find container information efficiently."""
-    container_row = filtered_df[
-        filtered_df["CONTAINER_ID"].astype(str).str.strip() == code
-    ]
-    return container_row.iloc[0] if not container_row.empty else None
-
-def process_pallet_match(container_info, code, filtered_df, final_df):
-    """Process pallet matching logic without P&L distinction."""
-    try:
-        vpn = container_info["VPN"]
-        color = container_info["DIFF_1"] if "DIFF_1" in container_info else "N/A"
-
-        # New combined key: only VPN + Color
-        vpns_combined_key = f"{vpn}:{color}"
+            # Reset scan state, resuming this station's earlier scans
+            restore_scan_state(selected_c_inv)
 
-        # Find pallet group
-        matching_pallet = final_df[final_df["VPNs_combined"] == vpns_combined_key]
-
-        item_code = str(container_info["ITEM"])
-        pallet_row = matching_pallet[matching_pallet["Item"] == item_code]
-
-        if not pallet_row.empty:
-            scan_carton_no = pallet_row["Scan_Carton_No"].iloc[0]
-            return scan_carton_no, f"Pallet - {scan_carton_no}", "success"
-        else:
-            return None, f"MISMATCH: {code} not found in pallet", "danger"
-
-    except Exception:
-        return None, "ERROR: Processing failed", "danger"
+def restore_scan_state(c_inv):
+    """Reset scan state for a C-INV, resuming from this station's ledger entries."""
+    recent = get_scan_ledger().recent(get_station(), c_inv, SCAN_HISTORY_LIMIT)
+    last = recent[0] if recent else None
+    st.session_state.update({
+        "scan_history": deque(
+            (f"{entry.timestamp[11:19]} - {entry.code}" for entry in recent),
+            maxlen=SCAN_HISTORY_LIMIT,
+        ),
+        "last_scan_status": last.status if last else "READY TO SCAN",
+        "status_type": last.status_type if last else "ready",
+        "scanned_pallet_no": last.pallet if last else None,
+        "last_item_display": None,
+        "last_scan_code": last.code if last else None,
+        "suggested_c_inv": None,
+        "scan_candidates": (),
+        "batch_result": None,
+        "batch_error": None
+    })
 
+def switch_c_inv(c_inv):
+    """Switch the session to another C-INV, as if picked in the selectbox."""
+    st.session_state.c_inv_select = c_inv
+    update_filtered_data(c_inv, st.session_state.snapshot)
 
+@timed("process_scan")
 def process_scan():
     """Process barcode scan with optimized logic."""
     code = st.session_state.scan_text.strip().upper()
@@ -151,49 +233,49 @@ def process_scan():
             "last_scan_status": "EMPTY SCAN",
             "status_type": "danger",
             "scanned_pallet_no": None,
-            "last_item_display": None
+            "last_item_display": None,
+            "scan_candidates": ()
         })
         return
 
-    # Check container map first (faster lookup)
-    container_map = st.session_state.container_map
-    value = container_map.get(code) or container_map.get(f"{code}_alt")
+    result = get_scan_engine().scan(
+        get_station(),
+        st.session_state.last_selected_c_inv,
+        code,
+        auto_switch=st.session_state.get("auto_switch_c_inv", False),
+        snapshot=st.session_state.snapshot,
+    )
     
-    if not value:
-        st.session_state.update({
-            "last_scan_status": f"MISMATCH: {code} not found",
-            "status_type": "danger",
-            "scanned_pallet_no": None,
-            "last_item_display": None
-        })
+    if result.c_inv != st.session_state.last_selected_c_inv:
+        # Auto-switched; the restored history already includes this scan
+        switch_c_inv(result.c_inv)
     else:
-        # Find container info
-        container_info = find_container_info(code, st.session_state.filtered_df)
-        
-        if container_info is None:
-            st.session_state.update({
-                "last_scan_status": f"MISMATCH: {code} not in data",
-                "status_type": "danger",
-                "scanned_pallet_no": None,
-                "last_item_display": None
-            })
-        else:
-            # Process pallet matching
-            pallet_no, status, status_type = process_pallet_match(
-                container_info, code, st.session_state.filtered_df, st.session_state.final_df
-            )
-            
-            st.session_state.update({
-                "last_scan_status": status,
-                "status_type": status_type,
-                "scanned_pallet_no": pallet_no,
-                "last_item_display": None  # Will be set in render_item_info
-            })
-
-    # Add to scan history and clear input
-    st.session_state.scan_history.insert(0, f"{timestamp} - {code}")
+        st.session_state.scan_history.appendleft(f"{timestamp} - {code}")
+    
+    st.session_state.update({
+        "last_scan_status": result.status,
+        "status_type": result.status_type,
+        "scanned_pallet_no": result.pallet,
+        "last_item_display": None,  # Will be set in render_item_info
+        "last_scan_code": code,
+        "suggested_c_inv": result.suggested_c_inv,
+        "scan_candidates": result.candidates
+    })
     st.session_state.scan_text = ""
 
+    # Set on the landing page; measures startup as the operator sees it
+    started = st.session_state.get("session_started")
+    if started is not None and "first_scan_seconds" not in st.session_state:
+        st.session_state.first_scan_seconds = time.perf_counter() - started
+        record_since("time to first scan", started)
+
+def get_last_scan_entry():
+    """Return the index entry for the last scanned code, or None."""
+    if not st.session_state.scan_history:
+        return None
+    return get_invoice().scan_index.lookup(st.session_state.last_scan_code)
+
+@timed("render_logo")
 def render_logo():
     """Render logo with error handling."""
     try:
@@ -203,6 +285,7 @@ def render_logo():
     except FileNotFoundError:
         st.warning("Logo not found")
 
+@timed("render_status_header")
 def render_status_header():
     """Render status header with dynamic styling."""
     # Check if we need to override status type based on mixed items
@@ -213,104 +296,241 @@ def render_status_header():
     header_color = STATUS_COLORS.get(status_type, "#3498db")
     font_size = "4rem" if status_type == "success" else "4rem"
     
+    # Fill level of the pallet the last carton went to
+    pallet_no = st.session_state.scanned_pallet_no
+    pallet_progress = ""
+    if pallet_no is not None:
+        pallet_progress = (
+            f'<p style="color:white;margin:0;font-size:1.5rem;">'
+            f'{get_progress().pallet_summary(pallet_no)} cartons on this pallet</p>'
+        )
+    
     st.markdown(
         f"""
         <div style="background:{header_color};padding:1rem;border-radius:10px;text-align:center;">
             <h1 style="color:white;margin:0;font-size:{font_size};">{st.session_state.last_scan_status}</h1>
+            {pallet_progress}
         </div>
         """,
         unsafe_allow_html=True,
     )
 
+@timed("render_c_inv_suggestion")
+def render_c_inv_suggestion():
+    """Offer a one-click switch when the last carton belongs to another C-INV."""
+    suggested_c_inv = st.session_state.suggested_c_inv
+    if suggested_c_inv is not None:
+        st.button(
+            f"Switch to C-INV {suggested_c_inv}",
+            on_click=switch_c_inv,
+            args=(suggested_c_inv,),
+            use_container_width=True,
+        )
+
+def pick_scan_candidate(code):
+    """Scan a container ID picked from the candidate list."""
+    st.session_state.scan_text = code
+    process_scan()
+
+@timed("render_scan_candidates")
+def render_scan_candidates():
+    """Offer the closest container IDs after a partial or damaged scan."""
+    candidates = st.session_state.scan_candidates
+    if not candidates:
+        return
+    st.caption("Did you mean:")
+    for i, candidate in enumerate(candidates):
+        other_c_inv = "" if candidate.c_inv == st.session_state.last_selected_c_inv else f" · C-INV {candidate.c_inv}"
+        st.button(
+            f"{candidate.code} ({candidate.match}{other_c_inv})",
+            key=f"scan_candidate_{i}",
+            on_click=pick_scan_candidate,
+            args=(candidate.code,),
+            use_container_width=True,
+        )
+
+@timed("render_item_info")
 def render_item_info():
     """Render last scanned item information."""
-    if not st.session_state.scan_history:
-        return
-        
-    last_code = st.session_state.scan_history[0].split()[-1]
-    filtered_df = st.session_state.filtered_df
-    
-    row = filtered_df[filtered_df["CONTAINER_ID"].astype(str).str.strip() == last_code]
-    if row.empty:
+    entry = get_last_scan_entry()
+    if entry is None:
         return
         
     # Item info
-    unique_items = row["ITEM"].unique()
-    item_code_display = "MIXED" if len(unique_items) > 1 else unique_items[0]
+    item_code_display = ScanIndex.item_display(entry)
     
     # Store the item display type for header color logic
     st.session_state.last_item_display = item_code_display
     
-    price = row["PRICE"].iloc[0] if "PRICE" in row.columns else "N/A"
-    total_for_item = filtered_df[filtered_df["ITEM"].isin(unique_items)]["CONTAINER_ID"].nunique()
-    
     st.markdown(
         f"""
         <div class="info-box">
-        <b>ITEM:</b> {item_code_display} | <b>Total Containers:</b> {total_for_item} | <b>Price:</b> {price}
+        <b>ITEM:</b> {item_code_display} | <b>Total Containers:</b> {entry.total_containers} | <b>Price:</b> {entry.price}
         </div>
         """,
         unsafe_allow_html=True,
     )
     
     # Style/Color info
-    style = row["VPN"].iloc[0]
-    color = row["DIFF_1"].iloc[0] if "DIFF_1" in row.columns else "N/A"
-    
     st.markdown(
         f"""
         <div class="style-info">
-        <b>Style:</b> {style} | <b>Color:</b> {color}
+        <b>Style:</b> {entry.style} | <b>Color:</b> {entry.color}
         </div>
         """,
         unsafe_allow_html=True,
     )
 
+@timed("render_info_section")
 def render_info_section():
     """Render information and recent scans section."""
-    total_cartons = st.session_state.filtered_df['CONTAINER_ID'].nunique()
+    progress = get_progress()
     
     st.markdown("<h3 style='color:white;text-align:center;'>📊 INFORMATION</h3>", unsafe_allow_html=True)
     st.markdown(
         f"""
         <div class="info-box">
-        <b>📦 Total Cartons:</b> {total_cartons}
+        <b>📦 Total Cartons:</b> {progress.total_expected} | <b>Scanned:</b> {progress.total_scanned}
+        | <b>Remaining:</b> {progress.total_remaining} | <b>Duplicates:</b> {progress.total_duplicates}
         </div>
         """,
         unsafe_allow_html=True,
     )
+    if progress.total_scanned:
+        with st.expander("Pallet progress"):
+            st.dataframe(progress.table(), hide_index=True)
 
     st.markdown("<h3 style='color:white;text-align:center;'>RECENT SCANS</h3>", unsafe_allow_html=True)
     
     if st.session_state.scan_history:
-        # Show only last 10 scans for performance
-        for scan in st.session_state.scan_history[:10]:
+        # The history only ever holds the last SCAN_HISTORY_LIMIT scans
+        for scan in st.session_state.scan_history:
             st.markdown(f"<div class='scan-history'>{scan}</div>", unsafe_allow_html=True)
     else:
         st.markdown("<div class='no-scans'>No scans yet...</div>", unsafe_allow_html=True)
 
-def run_max_page():
-    """Main Max page function - optimized version."""
-    # Apply cached styles
-    st.markdown(get_page_styles(), unsafe_allow_html=True)
-    
-    # Initialize session state
-    init_session_state()
-    
-    # Render logo
-    render_logo()
-    
-    # Load data
-    main_df = load_max_data()
-    c_inv_list = get_c_inv_list(main_df)
-    
-    # C-INV selection
-    selected_c_inv = st.selectbox("Select a C-INV", c_inv_list)
-    
-    # Update filtered data if needed
-    update_filtered_data(selected_c_inv, main_df)
-    
-    # Scan input
+def process_batch_scan():
+    """Resolve the pasted/uploaded batch of container IDs in one pass."""
+    uploaded = st.session_state.get("batch_file")
+    try:
+        codes = read_codes(
+            st.session_state.get("batch_text", ""),
+            uploaded.getvalue() if uploaded is not None else None,
+        )
+    except ValueError as e:
+        st.session_state.batch_error = str(e)
+        st.session_state.batch_result = None
+        return
+    st.session_state.batch_error = None
+    invoice = get_invoice()
+    st.session_state.batch_result = resolve_batch(
+        codes,
+        st.session_state.last_selected_c_inv,
+        invoice.scan_index,
+        st.session_state.snapshot.carton_index,
+    )
+
+@timed("render_batch_scan")
+def render_batch_scan():
+    """Render the batch scan panel for uploaded handheld scan dumps."""
+    with st.expander("📥 Batch scan"):
+        st.text_area("Paste container IDs (one per line)", key="batch_text")
+        st.file_uploader("...or upload a CSV of container IDs", type=["csv", "txt"], key="batch_file")
+        st.button("Resolve batch", on_click=process_batch_scan)
+
+        if st.session_state.get("batch_error"):
+            st.error(f"❌ {st.session_state.batch_error}")
+        result = st.session_state.get("batch_result")
+        if result is None:
+            return
+        summary = summarize_batch(result)
+        st.markdown(
+            " | ".join(f"<b>{status}:</b> {count}" for status, count in summary.items()),
+            unsafe_allow_html=True,
+        )
+        st.download_button(
+            "Download pallet assignments",
+            result.to_csv(index=False).encode("utf-8"),
+            file_name=f"batch_scan_{st.session_state.last_selected_c_inv}.csv",
+            mime="text/csv",
+        )
+        # Only a preview goes to the browser; the full table is in the download
+        st.dataframe(result.head(100), hide_index=True)
+
+def turn_summary_page(step):
+    """Move the pallet summary by step pages (0 goes back to the first page)."""
+    st.session_state.summary_page = st.session_state.get("summary_page", 1) + step if step else 1
+
+@st.fragment
+@timed("render_pallet_summary")
+def render_pallet_summary():
+    """Render one page of the per-Main_No pallet summary and a drill-down.
+
+    Runs as a fragment, so paging and filtering rerun only this section,
+    and only the visible page is sent to the browser.
+    """
+    summary = get_invoice().summary
+    progress = get_progress()
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    query = col1.text_input(
+        "Filter by Main_No, VPN:color or item", key="summary_filter",
+        on_change=turn_summary_page, args=(0,),
+    )
+    status = col2.selectbox(
+        "Status", STATUS_FILTERS, key="summary_status", on_change=turn_summary_page, args=(0,)
+    )
+    col3.button("↻ Refresh", key="summary_refresh", help="Pick up scans made since the last refresh")
+
+    rows, page_no, pages, matched = summary.page(
+        progress, query, status, st.session_state.get("summary_page", 1)
+    )
+    st.session_state.summary_page = page_no
+    first = (page_no - 1) * PAGE_SIZE
+    col1, col2, col3 = st.columns([1, 6, 1])
+    col1.button("◀", key="summary_prev", on_click=turn_summary_page, args=(-1,), disabled=page_no <= 1)
+    col2.caption(
+        f"Pallets {first + 1 if matched else 0}–{first + len(rows)} of {matched} "
+        f"· page {page_no} of {pages} · {len(summary)} in this C-INV"
+    )
+    col3.button("▶", key="summary_next", on_click=turn_summary_page, args=(1,), disabled=page_no >= pages)
+    st.dataframe(rows, hide_index=True)
+
+    # Drill into one Main_No of the visible page
+    options = [None] + rows["Main_No"].tolist()
+    if st.session_state.get("summary_main") not in options:
+        st.session_state.summary_main = None
+    vpns = dict(zip(rows["Main_No"], rows["VPN:Color"]))
+    main_no = st.selectbox(
+        "Pallet details",
+        options,
+        key="summary_main",
+        format_func=lambda value: "Select a Main_No..." if value is None else f"{value} · {vpns[value]}",
+    )
+    if main_no is not None:
+        st.dataframe(summary.pallet(main_no, progress), hide_index=True)
+
+def record_render_time(scope, start):
+    """Store how long a render scope took, in milliseconds."""
+    st.session_state.setdefault("render_ms", {})[scope] = (time.perf_counter() - start) * 1000
+
+@st.fragment
+@timed("render_scan_panel")
+def render_scan_panel():
+    """Render the scan input and everything a scan updates.
+
+    Runs as a fragment: a scan reruns only this panel, not the logo, CSS,
+    C-INV selector or summary around it.
+    """
+    start = time.perf_counter()
+
+    # A scan or button that switched invoice needs the invoice-level widgets too,
+    # and a refreshed snapshot is only adopted by load_max_data on a full rerun
+    latest = get_snapshot_store().current
+    if (st.session_state.last_selected_c_inv != st.session_state.rendered_c_inv
+            or (latest is not None and latest is not st.session_state.snapshot)):
+        st.rerun()
+
     col1, col2 = st.columns([4, 0.5])
     with col1:
         st.text_input(
@@ -322,27 +542,89 @@ def run_max_page():
     
     # Render UI components - First get item info to set display type, then render header at top
     # We need to call render_item_info first to set last_item_display, but display header first
-    if st.session_state.scan_history:
-        last_code = st.session_state.scan_history[0].split()[-1]
-        filtered_df = st.session_state.filtered_df
-        row = filtered_df[filtered_df["CONTAINER_ID"].astype(str).str.strip() == last_code]
-        if not row.empty:
-            unique_items = row["ITEM"].unique()
-            item_code_display = "MIXED" if len(unique_items) > 1 else unique_items[0]
-            st.session_state.last_item_display = item_code_display
+    entry = get_last_scan_entry()
+    if entry is not None:
+        st.session_state.last_item_display = ScanIndex.item_display(entry)
     
     render_status_header()
+    render_c_inv_suggestion()
+    render_scan_candidates()
     render_item_info()
     render_info_section()
+
+    # Render times are for diagnostics (?diag=1), not for operators
+    timings = st.session_state.get("render_ms", {})
+    if timings and st.query_params.get("diag") == "1":
+        st.caption(" · ".join(f"{scope} {ms:.1f} ms" for scope, ms in timings.items()))
+    record_render_time("scan panel", start)
+
+@timed("full rerun")
+def render_max_page():
+    """Render the whole Max page."""
+    start = time.perf_counter()
+    # Apply cached styles
+    st.markdown(get_page_styles(), unsafe_allow_html=True)
     
-    # Initialize toggle
-    if "show_summary" not in st.session_state:
-        st.session_state.show_summary = False
+    # Initialize session state
+    init_session_state()
+    
+    # Render logo
+    render_logo()
     
+    # Load data
+    snapshot = load_max_data()
+    
+    # C-INV selection
+    selected_c_inv = st.selectbox("Select a C-INV", snapshot.c_inv_list, key="c_inv_select")
+    st.checkbox("Auto-switch C-INV when a carton belongs to another invoice", key="auto_switch_c_inv")
+    
+    # Update filtered data if needed
+    update_filtered_data(selected_c_inv, snapshot)
+    
+    # Scan input, status and recent scans rerun on their own on each scan
+    st.session_state.rendered_c_inv = selected_c_inv
+    render_scan_panel()
+    render_batch_scan()
+    
+    # Pallet summary, paged on the server
+    if st.toggle("Show pallet summary", key="show_summary"):
+        render_pallet_summary()
+    record_render_time("full page", start)
+
+def render_diagnostics():
+    """Hidden diagnostics panel (?diag=1): stage latency percentiles and exports."""
+    with st.expander("Diagnostics", expanded=True):
+        st.dataframe(RECORDER.stats(), hide_index=True)
+        cache = get_snapshot_store().cache.stats()
+        st.caption(
+            f"Artifact cache: {cache['entries']} invoices, {cache['bytes'] / 2**20:.1f} MB, "
+            f"{cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions"
+        )
+        col1, col2, col3 = st.columns(3)
+        if col1.button("Export Prometheus", key="diag_export_prom"):
+            st.caption(RECORDER.export(os.path.join(METRICS_DIR, "max_metrics.prom")))
+        if col2.button("Export CSV", key="diag_export_csv"):
+            st.caption(RECORDER.export(os.path.join(METRICS_DIR, "max_metrics.csv")))
+        if col3.button("Reset", key="diag_reset"):
+            RECORDER.reset()
+
+def run_max_page():
+    """Main Max page function - optimized version."""
+    diagnostics = st.query_params.get("diag") == "1"
+    if diagnostics:
+        RECORDER.enabled = True
+
+    # ?profile=1 dumps a cProfile of every full rerun
+    if st.query_params.get("profile") == "1":
+        path, summary = profile_call(render_max_page)
+        with st.expander(f"Profile written to {path}"):
+            st.code(summary)
+    else:
+        render_max_page()
 
-    # Display dataframe if toggle is True
-    if st.session_state.show_summary:
-        st.dataframe(st.session_state.final_df)
+    if diagnostics:
+        render_diagnostics()
+    RECORDER.export_periodically()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+# Column looked up first when an uploaded CSV has a header row
+CODE_COLUMN = "CONTAINER_ID"
+
+BATCH_COLUMNS = [
+    "Seq", "CONTAINER_ID", "Status", "Scan_Carton_No", "Item", "Style", "Color",
+    "C-INV", "Scan_Count", "Duplicate",
+]
+
+
+def read_codes(text="", csv_bytes=None):
+    """Return the container IDs from pasted text and/or an uploaded CSV.
+
+    Rows may have any number of fields and blank lines are skipped. Raises
+    ValueError for an upload that is not UTF-8 CSV text.
+    """
+    codes = [line.split(",")[0] for line in text.splitlines()]
+    if csv_bytes:
+        try:
+            rows = [row for row in csv.reader(io.StringIO(csv_bytes.decode("utf-8-sig"))) if row]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ValueError(f"The uploaded file is not a readable CSV: {e}") from e
+        column = 0
+        header = [value.strip().upper() for value in rows[0]] if rows else []
+        if CODE_COLUMN in header:
+            column = header.index(CODE_COLUMN)
+            rows = rows[1:]
+        codes.extend(row[column] for row in rows if len(row) > column)
+    return codes
+
+
+def resolve_batch(codes, c_inv, scan_index, carton_index):
+    """Resolve a list of scanned codes against one invoice in a single join.
+
+    Returns one row per code, in scan order, with the pallet assignment and
+    a Status of OK, NOT IN PALLET, WRONG C-INV or MISMATCH. Repeated codes
+    are flagged with Duplicate on every scan after the first.
+    """
+    normalized = pd.Series(codes, dtype=object).astype(str).str.strip().str.upper()
+    normalized = normalized[normalized != ""].reset_index(drop=True)
+
+    result = pd.DataFrame({"Seq": np.arange(1, len(normalized) + 1), "CONTAINER_ID": normalized})
+    result = result.join(scan_index.table, on="CONTAINER_ID")
+    in_invoice = result["Item"].notna().to_numpy()
+
+    # Codes missing from this invoice are looked up across all invoices at once
+    c_invs = np.full(len(result), c_inv, dtype=object)
+    missing = ~in_invoice
+    located, _ = carton_index.lookup_many(result.loc[missing, "CONTAINER_ID"])
+    c_invs[missing] = located
+    result["C-INV"] = c_invs
+
+    # Cartons of another invoice get no pallet here; C-INV says where they belong
+    other_invoice = np.zeros(len(result), dtype=bool)
+    other_invoice[missing] = pd.notna(located)
+
+    result["Status"] = np.select(
+        [in_invoice & result["Scan_Carton_No"].notna().to_numpy(), in_invoice, other_invoice],
+        ["OK", "NOT IN PALLET", "WRONG C-INV"],
+        default="MISMATCH",
+    )
+    result["Scan_Count"] = result.groupby("CONTAINER_ID")["Seq"].transform("size")
+    result["Duplicate"] = result["CONTAINER_ID"].duplicated(keep="first")
+    return result[BATCH_COLUMNS]
+
+
+def summarize_batch(result):
+    """Return counts per status plus the number of duplicate scans."""
+    counts = result["Status"].value_counts().to_dict()
+    counts["DUPLICATE"] = int(result["Duplicate"].sum())
+    return counts
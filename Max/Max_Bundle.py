@@ -0,0 +1,285 @@
+import argparse
+import bisect
+import glob
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime
+
+# A bundle is one C-INV's scan resolution (what its ScanIndex holds) in one
+# file. Layout, little-endian:
+#
+#   b"MAXBNDL1"  u32 header length  header JSON  padding to 8 bytes
+#   hashes       u64 per container, ascending (blake2b-64 of the ID)
+#   id_offsets   u32 per container + 1, into ids
+#   ids          UTF-8 container IDs, in hash order
+#   codes:<f>    u32 per container for each BundleEntry field, in hash order
+#
+# The header JSON holds the C-INV, packing-list version, export time,
+# section offsets and each field's label table. Reading a bundle needs the
+# standard library only, so offline stations never import pandas.
+MAGIC = b"MAXBNDL1"
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".maxb"
+
+# Same fields as Max_Scan_Index.ScanEntry, which cannot be imported without pandas
+BundleEntry = namedtuple(
+    "BundleEntry",
+    ["scan_carton_no", "items", "price", "style", "color", "total_containers"],
+)
+
+
+def normalize_code(code):
+    """Normalize a scanned or stored container ID, as Max_Scan_Index does."""
+    return str(code).strip().upper()
+
+
+def code_hash(code):
+    """Return the 64-bit key of a normalized container ID."""
+    return int.from_bytes(hashlib.blake2b(code.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def bundle_path(directory, c_inv):
+    return os.path.join(directory, f"{c_inv}{BUNDLE_SUFFIX}")
+
+
+def _plain(value):
+    """Convert a label to something JSON keeps: numpy scalars to Python, tuples to lists."""
+    if isinstance(value, tuple):
+        return [_plain(part) for part in value]
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def write_bundle(path, c_inv, scan_index, version=""):
+    """Compile an invoice's ScanIndex into a bundle file at path."""
+    keys = scan_index.keys.tolist()
+    hashes = [code_hash(key) for key in keys]
+    order = sorted(range(len(keys)), key=hashes.__getitem__)
+
+    encoded = [keys[i].encode("utf-8") for i in order]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    sections = [
+        ("hashes", array("Q", [hashes[i] for i in order]).tobytes()),
+        ("id_offsets", offsets.tobytes()),
+        ("ids", b"".join(encoded)),
+    ]
+    for field in BundleEntry._fields:
+        sections.append((f"codes:{field}", scan_index.codes[field].take(order).astype("<u4").tobytes()))
+
+    header = {
+        "format": FORMAT_VERSION,
+        "c_inv": _plain(c_inv),
+        "version": version,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "count": len(keys),
+        "labels": {field: [_plain(v) for v in scan_index.labels[field]] for field in BundleEntry._fields},
+        "sections": {},
+    }
+    # Section offsets depend on the header length, which depends on them;
+    # reserve room by sizing the header with generous placeholder offsets
+    for name, data in sections:
+        header["sections"][name] = [2**40, len(data)]
+    start = _align(len(MAGIC) + 4 + len(json.dumps(header).encode("utf-8")))
+    for name, data in sections:
+        header["sections"][name] = [start, len(data)]
+        start = _align(start + len(data))
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header_bytes).to_bytes(4, "little") + header_bytes)
+        for name, data in sections:
+            f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class LookupBundle:
+    """A memory-mapped bundle; lookup() is a binary search over ID hashes.
+
+    Opening reads only the header; the arrays are views into the mapping,
+    so pages are loaded from disk as lookups touch them. Stations use it
+    through the CLI:
+
+        python -m Max.Max_Bundle export bundles/            # while online
+        python -m Max.Max_Bundle scan bundles/ --c-inv 5001  # scans on stdin
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("lookup bundles are little-endian")
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a lookup bundle")
+        length = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        header = json.loads(self._map[start:start + length])
+
+        self.c_inv = header["c_inv"]
+        self.version = header["version"]
+        self.exported_at = header["exported_at"]
+        self._view = memoryview(self._map)
+        self._hashes = self._section(header, "hashes").cast("Q")
+        self._id_offsets = self._section(header, "id_offsets").cast("I")
+        self._ids = self._section(header, "ids")
+        self._codes = [self._section(header, f"codes:{field}").cast("I") for field in BundleEntry._fields]
+        labels = header["labels"]
+        labels["items"] = [tuple(items) for items in labels["items"]]
+        self._labels = [labels[field] for field in BundleEntry._fields]
+
+    def _section(self, header, name):
+        offset, length = header["sections"][name]
+        return self._view[offset:offset + length]
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, code):
+        return self._find(normalize_code(code)) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the mapping; the bundle cannot be used afterwards."""
+        for view in [self._hashes, self._id_offsets, self._ids, *self._codes, self._view]:
+            view.release()
+        self._map.close()
+
+    def _find(self, code):
+        key = code_hash(code)
+        encoded = code.encode("utf-8")
+        pos = bisect.bisect_left(self._hashes, key)
+        # Equal hashes are adjacent; compare the stored ID to rule out collisions
+        while pos < len(self._hashes) and self._hashes[pos] == key:
+            if self._ids[self._id_offsets[pos]:self._id_offsets[pos + 1]] == encoded:
+                return pos
+            pos += 1
+        return None
+
+    def lookup(self, code):
+        """Return the BundleEntry for a container ID, or None."""
+        pos = self._find(normalize_code(code))
+        if pos is None:
+            return None
+        return BundleEntry._make(labels[codes[pos]] for codes, labels in zip(self._codes, self._labels))
+
+
+def export_bundles(snapshot, directory, c_invs=None):
+    """Write a bundle for each C-INV of a snapshot (all by default); return the paths."""
+    os.makedirs(directory, exist_ok=True)
+    return [
+        write_bundle(bundle_path(directory, c_inv), c_inv, snapshot.get_invoice(c_inv).scan_index, snapshot.version)
+        for c_inv in (c_invs if c_invs is not None else snapshot.c_inv_list)
+    ]
+
+
+def open_bundles(directory):
+    """Return {C-INV as text: LookupBundle} for every bundle in a directory."""
+    bundles = {}
+    for path in sorted(glob.glob(os.path.join(directory, f"*{BUNDLE_SUFFIX}"))):
+        bundle = LookupBundle(path)
+        bundles[str(bundle.c_inv)] = bundle
+    return bundles
+
+
+def resolve(bundles, c_inv, code):
+    """Return (pallet, status, status_type) for a scan, like ScanEngine.scan."""
+    code = normalize_code(code)
+    if not code:
+        return None, "EMPTY SCAN", "danger"
+    entry = bundles[c_inv].lookup(code)
+    if entry is None:
+        for other, bundle in bundles.items():
+            if other != c_inv and code in bundle:
+                return None, f"WRONG C-INV: {code} is in {other}", "warning"
+        return None, f"MISMATCH: {code} not found", "danger"
+    if entry.scan_carton_no is None:
+        return None, f"MISMATCH: {code} not found in pallet", "danger"
+    return entry.scan_carton_no, f"Pallet - {entry.scan_carton_no}", "success"
+
+
+def run_export(args):
+    from Max.Max_Data_IN import load_packing_list
+    from Max.Max_Snapshot import SnapshotStore
+
+    snapshot = SnapshotStore().get(load_packing_list)
+    c_invs = None
+    if args.c_inv:
+        wanted = set(args.c_inv)
+        c_invs = [c_inv for c_inv in snapshot.c_inv_list if str(c_inv) in wanted]
+    for path in export_bundles(snapshot, args.directory, c_invs):
+        print(path)
+
+
+def run_scan(args):
+    from Max.Max_Scan_Ledger import LEDGER_PATH, ScanLedger
+
+    start = time.perf_counter()
+    bundles = open_bundles(args.directory)
+    if args.c_inv not in bundles:
+        sys.exit(f"No bundle for C-INV {args.c_inv} in {args.directory}")
+    bundle = bundles[args.c_inv]
+    print(f"C-INV {args.c_inv}: {len(bundle)} containers, packing list {bundle.version}, "
+          f"exported {bundle.exported_at}; {len(bundles)} bundles opened in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+    ledger = ScanLedger(args.ledger or LEDGER_PATH)
+    # Cartons already counted for this invoice, so a restarted station resumes
+    seen = {entry.code for entry in ledger.invoice_history(bundle.c_inv) if entry.pallet is not None}
+    try:
+        for line in sys.stdin:
+            code = normalize_code(line)
+            pallet, status, status_type = resolve(bundles, args.c_inv, code)
+            if pallet is not None:
+                if code in seen:
+                    status = f"{status} (DUPLICATE)"
+                seen.add(code)
+            if code:
+                ledger.append(args.station, bundle.c_inv, code, pallet, status, status_type)
+            print(status, flush=True)
+    finally:
+        ledger.close()
+
+
+def main():
+    """Export per-invoice lookup bundles, or scan offline against them."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write a bundle per C-INV from the packing list")
+    export.add_argument("directory")
+    export.add_argument("--c-inv", action="append", help="only this C-INV (repeatable)")
+    scan = commands.add_parser("scan", help="resolve scans read from stdin, one per line")
+    scan.add_argument("directory")
+    scan.add_argument("--c-inv", required=True)
+    scan.add_argument("--station", default="offline")
+    scan.add_argument("--ledger", help="scan ledger path (default MAX_LEDGER_PATH)")
+    args = parser.parse_args()
+    if args.command == "export":
+        run_export(args)
+    else:
+        run_scan(args)
+
+
+if __name__ == "__main__":
+    main()
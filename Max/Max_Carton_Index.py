@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from Max.Max_Data_IN import allocate_cartons, clean_columns, join_columns
+from Max.Max_Scan_Index import normalize_code
+
+
+class CartonIndex:
+    """Container ID -> (C-INV, Scan_Carton_No) across every invoice.
+
+    Keys live in a single hashed pandas Index; invoices and scan carton
+    numbers are stored as int32 codes into small label arrays, so the index
+    stays compact for millions of cartons.
+    """
+
+    def __init__(self, keys, c_inv_codes, c_inv_labels, carton_codes, carton_labels):
+        self.keys = keys
+        self.c_inv_codes = c_inv_codes
+        self.c_inv_labels = c_inv_labels
+        self.carton_codes = carton_codes
+        self.carton_labels = carton_labels
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nbytes(self):
+        return int(
+            self.keys.memory_usage(deep=True)
+            + self.c_inv_codes.nbytes
+            + self.carton_codes.nbytes
+        )
+
+    def lookup(self, code):
+        """Return (c_inv, scan_carton_no) for a container ID, or None."""
+        try:
+            pos = self.keys.get_loc(normalize_code(code))
+        except KeyError:
+            return None
+        carton_code = self.carton_codes[pos]
+        scan_carton_no = self.carton_labels[carton_code] if carton_code >= 0 else None
+        return self.c_inv_labels[self.c_inv_codes[pos]], scan_carton_no
+
+    def lookup_many(self, codes):
+        """Vectorized lookup of normalized codes; returns (c_inv, scan_carton_no) arrays.
+
+        Codes that are not found get None in both arrays.
+        """
+        pos = self.keys.get_indexer(codes)
+        found = pos >= 0
+        c_invs = np.full(len(pos), None, dtype=object)
+        cartons = np.full(len(pos), None, dtype=object)
+        c_invs[found] = self.c_inv_labels[self.c_inv_codes[pos[found]]]
+        carton_codes = self.carton_codes[pos[found]]
+        if len(self.carton_labels):
+            cartons[found] = np.where(
+                carton_codes >= 0, self.carton_labels[np.maximum(carton_codes, 0)], None
+            )
+        return c_invs, cartons
+
+
+def build_carton_index(data, max_per_item=15):
+    """Build the CartonIndex for a whole packing list in one vectorized pass.
+
+    Uses the same first-row-per-container rule and pallet allocation as the
+    per-invoice ScanIndex. A container ID listed under several invoices
+    resolves to the first one.
+    """
+    c_inv_codes, c_inv_labels = pd.factorize(data["C-INVC-NO"])
+    df = clean_columns(data, ["CONTAINER_ID", "ITEM", "VPN", "DIFF_1"], upper=["CONTAINER_ID"])
+    df["VPNs_combined"] = join_columns(df["VPN"], df["DIFF_1"])
+    df["INV"] = c_inv_codes
+    df = df[df["INV"] >= 0]
+
+    cartons, _ = allocate_cartons(df, max_per_item, by="INV")
+    first = cartons.drop_duplicates("CONTAINER_ID")
+    carton_codes, carton_labels = pd.factorize(first["Scan_Carton_No"])
+
+    return CartonIndex(
+        keys=pd.Index(first["CONTAINER_ID"].to_numpy(), dtype=object),
+        c_inv_codes=first["INV"].to_numpy(dtype=np.int32),
+        c_inv_labels=np.asarray(c_inv_labels, dtype=object),
+        carton_codes=carton_codes.astype(np.int32),
+        carton_labels=np.asarray(carton_labels, dtype=object),
+    )
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from Max.Max_Scan_Index import normalize_code
+
+# Shortest partial ID matched as a prefix or suffix
+MIN_PARTIAL_LENGTH = 3
+# Candidates offered for one damaged or partial scan
+CANDIDATE_LIMIT = 5
+
+
+class ContainerSearch:
+    """Prefix, suffix and one-edit candidate lookup over container IDs.
+
+    Built once per key set (an invoice's ScanIndex keys, or the snapshot's
+    CartonIndex keys). Prefixes and suffixes are binary searches over the
+    IDs sorted forwards and reversed, held as fixed-width numpy byte strings
+    (UTF-8, one byte per character of an ASCII ID) so sorting and searching
+    run in C. One-edit neighbours of the query
+    (substitution, insertion, deletion or swap of adjacent characters,
+    drawn from the characters the IDs use) are probed against the keys'
+    existing hash index, so they cost no memory per key.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys if isinstance(keys, pd.Index) else pd.Index(keys, dtype=object)
+        values = self.keys.to_numpy().tolist()
+        self._sorted = np.sort(np.array([value.encode("utf-8") for value in values], dtype=bytes))
+        self._reversed = np.sort(np.array([value[::-1].encode("utf-8") for value in values], dtype=bytes))
+        self._alphabet = "".join(sorted(set("".join(values))))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held beyond the shared keys, for cache accounting."""
+        return int(self._sorted.nbytes + self._reversed.nbytes)
+
+    def _range(self, values, prefix, limit):
+        """Return up to limit of the sorted values that start with prefix."""
+        prefix = prefix.encode("utf-8")
+        if not prefix or len(prefix) > values.dtype.itemsize:
+            return []
+        # The smallest string of this length above every string with the
+        # prefix; UTF-8 never uses byte 0xff, so the last byte can be raised
+        after = prefix[:-1] + bytes([prefix[-1] + 1])
+        start, end = np.searchsorted(values, np.array([prefix, after], dtype=values.dtype))
+        return [value.decode("utf-8") for value in values[start:min(end, start + limit)].tolist()]
+
+    def prefix(self, partial, limit=CANDIDATE_LIMIT):
+        """Return up to limit IDs starting with partial, in sorted order."""
+        return self._range(self._sorted, partial, limit)
+
+    def suffix(self, partial, limit=CANDIDATE_LIMIT):
+        """Return up to limit IDs ending with partial."""
+        return [value[::-1] for value in self._range(self._reversed, partial[::-1], limit)]
+
+    def edits(self, code, limit=CANDIDATE_LIMIT):
+        """Return up to limit IDs one edit away from code."""
+        letters = self._alphabet
+        splits = [(code[:i], code[i:]) for i in range(len(code) + 1)]
+        variants = [a + b[1:] for a, b in splits if b]
+        variants += [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1 and b[0] != b[1]]
+        variants += [a + c + b[1:] for a, b in splits if b for c in letters if c != b[0]]
+        variants += [a + c + b for a, b in splits for c in letters]
+        positions = self.keys.get_indexer(variants)
+        found = positions[positions >= 0]
+        return self.keys.take(pd.unique(found)[:limit]).tolist()
+
+    def search(self, code, limit=CANDIDATE_LIMIT):
+        """Return up to limit (ID, match) pairs for a partial or damaged scan.
+
+        One-edit matches come first, then IDs the code starts or ends; an
+        exact match is not a candidate.
+        """
+        code = normalize_code(code)
+        if not code or not len(self.keys):
+            return []
+        found = {value: "1 edit" for value in self.edits(code, limit)}
+        if len(code) >= MIN_PARTIAL_LENGTH:
+            for value in self.prefix(code, limit + 1):
+                found.setdefault(value, "prefix")
+            for value in self.suffix(code, limit + 1):
+                found.setdefault(value, "suffix")
+        found.pop(code, None)
+        return list(found.items())[:limit]
@@ -1,41 +1,125 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
-from office365.sharepoint.client_context import ClientContext
-from office365.runtime.auth.user_credential import UserCredential
-import io
+import glob
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from Max.Max_Excel_Ingest import stream_packing_list
+from Max.Max_File_Cache import FileCache, LocalFileClient, SharePointClient
 
 # SharePoint Configuration
 SHAREPOINT_SITE = "https://landmarkgroup.sharepoint.com/sites/STNApplication"
 SHAREPOINT_FILE_PATH = "/sites/STNApplication/Shared Documents/Jeddah Fashion/supplier_packing_list_out.xlsx"
+# When set (e.g. "/sites/STNApplication/Shared Documents/Jeddah Fashion"),
+# every workbook in the folder is loaded and merged instead of the one file
+SHAREPOINT_FOLDER_PATH = os.environ.get("MAX_SHAREPOINT_FOLDER_PATH", "")
+# Parallel downloads and workbook parsers for folder loads
+DOWNLOAD_WORKERS = int(os.environ.get("MAX_DOWNLOAD_WORKERS", "4"))
+PARSE_WORKERS = int(os.environ.get("MAX_PARSE_WORKERS", str(os.cpu_count() or 1)))
 
-def load_data():
-    """Load Excel file from SharePoint using API."""
+# Local cache of downloaded workbooks; server metadata is rechecked at most
+# once per METADATA_TTL_SECONDS. MAX_LOCAL_SHAREPOINT_DIR serves files from a
+# local folder instead of SharePoint (tests, benchmarks, offline development).
+CACHE_DIR = os.environ.get("MAX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "stn_max_cache"))
+METADATA_TTL_SECONDS = float(os.environ.get("MAX_METADATA_TTL_SECONDS", "60"))
+LOCAL_SHAREPOINT_DIR = os.environ.get("MAX_LOCAL_SHAREPOINT_DIR")
+
+# Only these columns are used downstream; everything else is dropped at load
+REQUIRED_COLUMNS = ['C-INVC-NO', 'CONTAINER_ID', 'ITEM', 'VPN', 'DIFF_1', 'DIFF_2', 'PRICE']
+# String columns with few distinct values, stored as categoricals
+CATEGORICAL_COLUMNS = ['C-INVC-NO', 'ITEM', 'VPN', 'DIFF_1', 'DIFF_2']
+# Columns of the pallet allocation shown on the Max page
+FINAL_COLUMNS = ['Scan_Carton_No', 'Main_No', 'Sub_No', 'Pallet_No', 'VPNs_combined', 'Item', 'Cartons']
+
+def get_sharepoint_client():
+    """Return the client used to reach the packing-list file."""
+    if LOCAL_SHAREPOINT_DIR:
+        return LocalFileClient(LOCAL_SHAREPOINT_DIR)
+
+    # Get credentials from Streamlit secrets
+    username = st.secrets["sharepoint"]["username"]
+    password = st.secrets["sharepoint"]["password"]
+    return SharePointClient(SHAREPOINT_SITE, username, password)
+
+def fetch_packing_list(client_factory=get_sharepoint_client):
+    """Return (local_path, version) of the packing list, downloading only if it changed."""
+    cache = FileCache(client_factory, CACHE_DIR, METADATA_TTL_SECONDS)
+    return cache.fetch(SHAREPOINT_FILE_PATH)
+
+def fetch_packing_lists(client_factory=get_sharepoint_client):
+    """Return (files, version) for every packing list to load.
+
+    files is a tuple of (local_path, file_version) pairs: the workbooks of
+    SHAREPOINT_FOLDER_PATH when it is set, else just SHAREPOINT_FILE_PATH.
+    Only files whose server version changed are downloaded.
+    """
+    if not SHAREPOINT_FOLDER_PATH:
+        local_path, version = fetch_packing_list(client_factory)
+        return ((local_path, version),), version
+
+    cache = FileCache(client_factory, CACHE_DIR, METADATA_TTL_SECONDS, DOWNLOAD_WORKERS)
+    fetched = cache.fetch_folder(SHAREPOINT_FOLDER_PATH)
+    if not fetched:
+        raise FileNotFoundError(f"No packing lists in {SHAREPOINT_FOLDER_PATH}")
+    # The merged version changes whenever any file is added, removed or changed
+    digest = hashlib.blake2b(digest_size=16)
+    for path, (_, version) in sorted(fetched.items()):
+        digest.update(f"{path}\0{version}\0".encode('utf-8'))
+    return tuple(fetched[path] for path in sorted(fetched)), digest.hexdigest()
+
+def read_packing_lists(files):
+    """Read and merge the (local_path, file_version) pairs from fetch_packing_lists.
+
+    Workbooks without a Parquet conversion for their version are parsed in
+    a process pool; unchanged files are read from their conversions.
+    """
+    pending = [(path, file_version) for path, file_version in files
+               if not os.path.exists(_parquet_path(path, file_version))]
+    workers = min(PARSE_WORKERS, len(pending))
+    if workers > 1:
+        # spawn, not fork: the app server is multi-threaded
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            list(pool.map(_convert_packing_list, *zip(*pending)))
+    return merge_packing_lists([read_packing_list(path, file_version) for path, file_version in files])
+
+def merge_packing_lists(frames):
+    """Concatenate normalized packing lists, keeping shared columns categorical."""
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # C-INVs read as numbers in one workbook and as text in another cannot be
+    # sorted together; make them all text
+    c_invs = df['C-INVC-NO']
+    if pd.api.types.infer_dtype(c_invs.dropna().unique(), skipna=True).startswith('mixed'):
+        df['C-INVC-NO'] = c_invs.astype(object).map(_c_inv_text, na_action='ignore')
+    for column in CATEGORICAL_COLUMNS:
+        # Categoricals with different categories concatenate to object
+        if column in df.columns and df[column].dtype == object:
+            df[column] = df[column].astype('category')
+    return df
+
+def _c_inv_text(value):
+    # 5000.0 (a number column with blanks) is C-INV 5000
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def load_packing_list(client_factory=get_sharepoint_client):
+    """Return the packing list(s) as a (DataFrame, version) pair; errors propagate."""
+    files, version = fetch_packing_lists(client_factory)
+    return read_packing_lists(files), version
+
+def load_versioned_data(client_factory=get_sharepoint_client):
+    """Load the packing list from SharePoint as a (DataFrame, version) pair."""
     try:
-        # Get credentials from Streamlit secrets
-        username = st.secrets["sharepoint"]["username"]
-        password = st.secrets["sharepoint"]["password"]
-        
-        # Authenticate to SharePoint
-        ctx = ClientContext(SHAREPOINT_SITE).with_credentials(
-            UserCredential(username, password)
-        )
-        
-        # Download file from SharePoint
-        file = ctx.web.get_file_by_server_relative_url(SHAREPOINT_FILE_PATH)
-        
-        # Use BytesIO as the file object for download
-        download_file = io.BytesIO()
-        file.download(download_file).execute_query()
-        
-        # Reset position to beginning
-        download_file.seek(0)
-        
-        # Load into pandas
-        df = pd.read_excel(download_file)
-        df.columns = df.columns.str.strip()
+        # Only downloads when the server copy changed since the last fetch
+        df, version = load_packing_list(client_factory)
         
         st.success("✅ Data loaded successfully from SharePoint!")
-        return df
+        return df, version
         
     except KeyError:
         st.error("❌ SharePoint credentials not found in secrets!")
@@ -44,61 +128,271 @@ def load_data():
         st.error(f"❌ Failed to load from SharePoint: {e}")
         return None
 
+def normalize_packing_list(df):
+    """Project to REQUIRED_COLUMNS with stripped strings and categorical dtypes."""
+    df.columns = df.columns.str.strip()
+    columns = {}
+    for column in REQUIRED_COLUMNS:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if series.dtype != object:
+            columns[column] = series
+            continue
+
+        # Strip each distinct value once; missing values stay missing
+        codes, uniques = pd.factorize(series)
+        stripped = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        stripped_codes, categories = pd.factorize(stripped)
+        codes = np.where(codes >= 0, stripped_codes.take(codes), -1)
+        values = pd.Categorical.from_codes(codes, categories=categories)
+        if column not in CATEGORICAL_COLUMNS:
+            values = values.astype(object)
+        columns[column] = pd.Series(values, index=df.index, name=column)
+    return pd.DataFrame(columns).reset_index(drop=True)
+
+def _parquet_path(workbook_path, version):
+    base = os.path.splitext(workbook_path)[0]
+    return f"{base}-{hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]}.parquet"
+
+def _convert_packing_list(workbook_path, version):
+    """Write a workbook's Parquet conversion (process-pool worker)."""
+    read_packing_list(workbook_path, version)
+
+def read_packing_list(workbook_path, version):
+    """Read a downloaded workbook through a per-version Parquet conversion.
+
+    The first read of a version streams the workbook and writes a compact
+    Parquet file next to it; later reads memory-map just the used columns.
+    """
+    base = os.path.splitext(workbook_path)[0]
+    parquet_path = _parquet_path(workbook_path, version)
+    if os.path.exists(parquet_path):
+        # The file only holds REQUIRED_COLUMNS, so this is the projected read
+        return pd.read_parquet(parquet_path, memory_map=True)
+
+    df = normalize_packing_list(stream_packing_list(workbook_path, REQUIRED_COLUMNS))
+
+    # Write atomically, then drop conversions of older versions
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    for stale in glob.glob(f"{glob.escape(base)}-*.parquet"):
+        if stale != parquet_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return df
+
+def load_data():
+    """Load Excel file from SharePoint using API."""
+    loaded = load_versioned_data()
+    return loaded[0] if loaded is not None else None
+
 def get_filtered_data(c_inv, main_df):
-    """Return filtered DataFrame for a given C-INV."""
-    return main_df[main_df['C-INVC-NO'] == c_inv].copy()
+    """Return filtered DataFrame for a given C-INV.
+
+    The row selection is already a new frame and nothing downstream writes
+    to it, so no defensive copy is taken.
+    """
+    return main_df[main_df['C-INVC-NO'] == c_inv]
+
+def _strip_str(series, fill=None, upper=False):
+    """Return series.astype(str).str.strip(), stripping each distinct value once.
+
+    With fill, missing values become fill first, like fillna(fill). With
+    upper, values are also upper-cased; already upper-case strings are
+    reused rather than copied.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=fill is not None)
+    stripped = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    if upper:
+        stripped = stripped.map(lambda value: value if value.isupper() else value.upper())
+    stripped = stripped.to_numpy()
+    if fill is not None:
+        # Missing values have code -1, which takes the appended fill value
+        stripped = np.append(stripped, str(fill).strip())
+    return pd.Series(stripped.take(codes), index=series.index, name=series.name)
+
+def clean_columns(df, columns, upper=()):
+    """Return stripped string columns shared by the allocation builders.
+
+    Columns listed in upper are upper-cased too, e.g. CONTAINER_ID for
+    lookups against normalized scans.
+    """
+    source = {str(name).strip(): name for name in df.columns}
+    fills = {'DIFF_1': 'UNKNOWN', 'DIFF_2': ''}
+    cleaned = {}
+    for column in columns:
+        if column not in fills:
+            cleaned[column] = _strip_str(df[source[column]], upper=column in upper)
+        elif column in source:
+            cleaned[column] = _strip_str(df[source[column]], fills[column])
+        else:
+            cleaned[column] = pd.Series(fills[column], index=df.index, name=column)
+    return pd.DataFrame(cleaned, index=df.index)
+
+def join_columns(left, right, sep=':'):
+    """Return left + sep + right, building each distinct combined string once."""
+    left_codes, left_values = pd.factorize(left)
+    right_codes, right_values = pd.factorize(right)
+    width = max(len(right_values), 1)
+    codes, pairs = pd.factorize(left_codes.astype(np.int64) * width + right_codes)
+    joined = (
+        pd.Series(np.asarray(left_values, dtype=object).take(pairs // width))
+        + sep
+        + pd.Series(np.asarray(right_values, dtype=object).take(pairs % width))
+    ).to_numpy()
+    return pd.Series(joined.take(codes), index=left.index, name=left.name)
 
-@st.cache_data
 def build_container_map(df):
     """Return container lookup map for fast scans."""
-    df = df.copy()
-    df.columns = df.columns.str.strip()
-    df['DIFF_1'] = df.get('DIFF_1', 'UNKNOWN').fillna('UNKNOWN').astype(str).str.strip()
-    df['DIFF_2'] = df.get('DIFF_2', '').fillna('').astype(str).str.strip()
-
-    container_map = {}
-    for _, row in df.iterrows():
-        container_id = str(row['CONTAINER_ID']).strip()
-        vpn = str(row['VPN']).strip()
-        diff1 = row['DIFF_1']
-        diff2 = row['DIFF_2']
-        container_map[container_id] = (vpn, diff1)
-        container_map[f"{container_id}_alt"] = (vpn, diff2 + diff1 if diff2 else diff1)
-    return container_map
-
-@st.cache_data
-def get_final_df(df, max_per_item=15):
-    """Return final pallet allocation DataFrame without P&L distinction."""
-    df = df.copy()
-    df.columns = df.columns.str.strip()
-    df['CONTAINER_ID'] = df['CONTAINER_ID'].astype(str).str.strip()
-    df['ITEM'] = df['ITEM'].astype(str).str.strip()
-    df['VPN'] = df['VPN'].astype(str).str.strip()
-    df['DIFF_1'] = df.get('DIFF_1', '').fillna('UNKNOWN').astype(str).str.strip()
-    df['DIFF_2'] = df.get('DIFF_2', '').fillna('').astype(str).str.strip()
-
-    df['VPNs_combined'] = df.apply(lambda r: f"{r['VPN']}:{r['DIFF_1']}", axis=1)
-
-    results = []
-    main_counter = 1
-
-    for group_key, group_df in df.groupby('VPNs_combined'):
-        main_num = main_counter
-        main_counter += 1
-
-        item_list = group_df['ITEM'].unique()
-        for sub_idx, item_code in enumerate(item_list, start=1):
-            results.append({
-                'Main_No': main_num,
-                'Sub_No': sub_idx,
-                'Item': item_code,
-                'VPNs_combined': group_key
-            })
-
-    final_df = pd.DataFrame(results)
-    final_df['Scan_Carton_No'] = final_df.apply(
-        lambda r: f"{r['Main_No']}.{r['Sub_No']}", axis=1
+    df = clean_columns(df, ['CONTAINER_ID', 'VPN', 'DIFF_1', 'DIFF_2'])
+    container_ids = df['CONTAINER_ID'].to_numpy()
+    vpns = df['VPN'].to_numpy()
+    diff1 = df['DIFF_1']
+    diff2 = df['DIFF_2']
+    alt_diff = diff1.where(diff2 == '', diff2 + diff1).to_numpy()
+
+    # Interleave each container with its _alt key so later rows overwrite
+    # earlier ones exactly as a row-by-row build would
+    keys = np.empty(2 * len(df), dtype=object)
+    keys[0::2] = container_ids
+    keys[1::2] = container_ids + '_alt'
+    values = np.empty(2 * len(df), dtype=object)
+    values[0::2] = list(zip(vpns, diff1.to_numpy()))
+    values[1::2] = list(zip(vpns, alt_diff))
+    return dict(zip(keys.tolist(), values.tolist()))
+
+def allocate_pallets(df, by=None):
+    """Number VPN:color groups (Main_No) and their items (Sub_No).
+
+    df holds cleaned VPNs_combined and ITEM columns. Groups are numbered in
+    sorted key order and items in order of first appearance. With by, the
+    numbering restarts within each value of that column, so all invoices
+    can be allocated in one pass.
+    """
+    keys = ['VPNs_combined'] if by is None else [by, 'VPNs_combined']
+    pairs = df[keys + ['ITEM']].drop_duplicates()
+    pairs = pairs.sort_values(keys, kind='stable')
+
+    # After sorting, numbering groups by appearance follows the sort order
+    group_no = pairs.groupby(keys, sort=False).ngroup()
+    sub_no = group_no.groupby(group_no).cumcount() + 1
+    if by is None:
+        main_no = group_no + 1
+    else:
+        main_no = group_no - group_no.groupby(pairs[by]).transform('min') + 1
+
+    allocation = pairs.reset_index(drop=True)
+    allocation['Main_No'] = main_no.to_numpy(dtype='int64')
+    allocation['Sub_No'] = sub_no.to_numpy(dtype='int64')
+    allocation['Scan_Carton_No'] = (
+        allocation['Main_No'].astype(str) + '.' + allocation['Sub_No'].astype(str)
+    )
+    return allocation
+
+def _next_fit(groups, sizes, capacity, max_count=None):
+    """Next-fit bin numbers, restarting at 0 for each group.
+
+    Items are packed in the given order; a bin closes when the next item
+    would exceed capacity or max_count items. An item larger than capacity
+    gets a bin of its own.
+    """
+    bins = np.empty(len(sizes), dtype=np.int64)
+    previous, bin_no, load, count = None, -1, 0.0, 0
+    for i, (group, size) in enumerate(zip(groups.tolist(), sizes.tolist())):
+        if group != previous:
+            previous, bin_no, load, count = group, 0, 0.0, 0
+        elif count and (load + size > capacity or (max_count and count >= max_count)):
+            bin_no, load, count = bin_no + 1, 0.0, 0
+        load += size
+        count += 1
+        bins[i] = bin_no
+    return bins
+
+def allocate_cartons(df, max_per_item=None, by=None, weight=None, max_weight=None, combine=False):
+    """Assign every container to a pallet slot, splitting slots over capacity.
+
+    df holds cleaned CONTAINER_ID, VPNs_combined and ITEM columns; each
+    container is placed by its first row. A VPN:color/item slot keeps its
+    Scan_Carton_No from allocate_pallets while it fits on one pallet; a slot
+    over max_per_item cartons (or max_weight of the weight column) is split
+    into pallets numbered Main.Sub-1, Main.Sub-2, ... in row order. With
+    combine, single-pallet slots of the same VPN:color group are packed
+    together next-fit and share the first slot's Scan_Carton_No.
+
+    Returns (cartons, slots): the Scan_Carton_No of each container, and one
+    row per slot pallet with its Pallet_No and carton count.
+    """
+    if max_weight is not None and weight is None:
+        raise ValueError('max_weight needs a weight column')
+    if combine and not (max_per_item or max_weight):
+        raise ValueError('combine needs max_per_item or max_weight')
+    keys = ['VPNs_combined', 'ITEM'] if by is None else [by, 'VPNs_combined', 'ITEM']
+    pairs = allocate_pallets(df, by)
+    cartons = df.drop_duplicates(keys[:-2] + ['CONTAINER_ID'])
+    pair = pd.MultiIndex.from_frame(pairs[keys]).get_indexer(pd.MultiIndex.from_frame(cartons[keys]))
+
+    # Pallet number within each slot, in order of appearance
+    if weight is not None:
+        order = np.argsort(pair, kind='stable')
+        weights = cartons[weight].to_numpy(dtype='float64')
+        chunk = np.empty(len(pair), dtype=np.int64)
+        chunk[order] = _next_fit(pair[order], weights[order], max_weight or np.inf, max_per_item)
+    elif max_per_item:
+        chunk = pd.Series(pair).groupby(pair).cumcount().to_numpy() // max_per_item
+    else:
+        chunk = np.zeros(len(pair), dtype=np.int64)
+
+    n_pallets = np.ones(len(pairs), dtype=np.int64)
+    np.maximum.at(n_pallets, pair, chunk + 1)
+    first_slot = np.concatenate([[0], np.cumsum(n_pallets)[:-1]])
+    slot_pair = np.repeat(np.arange(len(pairs)), n_pallets)
+    carton_slot = first_slot[pair] + chunk
+
+    slots = pairs.iloc[slot_pair].reset_index(drop=True)
+    slots['Pallet_No'] = np.arange(len(slots)) - first_slot[slot_pair] + 1
+    slots['Cartons'] = np.bincount(carton_slot, minlength=len(slots))
+    split = n_pallets[slot_pair] > 1
+    slots.loc[split, 'Scan_Carton_No'] = (
+        slots.loc[split, 'Scan_Carton_No'] + '-' + slots.loc[split, 'Pallet_No'].astype(str)
     )
-    final_df = final_df.sort_values(by=['Main_No', 'Sub_No']).reset_index(drop=True)
+    if weight is not None:
+        slots['Weight'] = np.bincount(carton_slot, weights=weights, minlength=len(slots))
 
-    return final_df[['Scan_Carton_No', 'Main_No', 'Sub_No', 'VPNs_combined', 'Item']]
\ No newline at end of file
+    if combine:
+        # Only slots that fit on one pallet are packed together
+        packable = np.flatnonzero(~split & (slots['Cartons'].to_numpy() > 0))
+        group = slots.groupby(keys[:-1], sort=False).ngroup().to_numpy()[packable]
+        if weight is not None:
+            sizes, capacity, max_count = slots['Weight'].to_numpy()[packable], max_weight or np.inf, max_per_item
+        else:
+            sizes, capacity, max_count = slots['Cartons'].to_numpy()[packable], max_per_item, None
+        bins = _next_fit(group, sizes, capacity, max_count)
+        labels = slots['Scan_Carton_No'].to_numpy()[packable]
+        slots.loc[packable, 'Scan_Carton_No'] = (
+            pd.Series(labels).groupby([group, bins]).transform('first').to_numpy()
+        )
+
+    cartons = cartons[keys[:-2] + ['CONTAINER_ID']].reset_index(drop=True)
+    cartons['Scan_Carton_No'] = slots['Scan_Carton_No'].to_numpy()[carton_slot]
+    return cartons, slots
+
+def allocate_invoice(df, max_per_item=15):
+    """Return (cartons, final_df) for one invoice's rows.
+
+    cartons maps each upper-cased CONTAINER_ID to its Scan_Carton_No;
+    final_df lists the pallet slots without P&L distinction.
+    """
+    df = clean_columns(df, ['CONTAINER_ID', 'ITEM', 'VPN', 'DIFF_1'], upper=['CONTAINER_ID'])
+    df['VPNs_combined'] = join_columns(df['VPN'], df['DIFF_1'])
+
+    cartons, slots = allocate_cartons(df, max_per_item)
+    final_df = slots.rename(columns={'ITEM': 'Item'})
+    return cartons, final_df[FINAL_COLUMNS]
+
+def get_final_df(df, max_per_item=15):
+    """Return final pallet allocation DataFrame without P&L distinction."""
+    return allocate_invoice(df, max_per_item)[1]
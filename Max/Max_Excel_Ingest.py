@@ -0,0 +1,82 @@
+import pandas as pd
+
+
+def _find_header(rows):
+    """Return the first non-empty row of a sheet as stripped header names."""
+    for row in rows:
+        if any(value is not None for value in row):
+            return [str(value).strip() if value is not None else "" for value in row]
+    return None
+
+
+def _infer_numeric(series):
+    """Convert numeric-looking text columns to numbers, as pd.read_excel does."""
+    if series.dtype != object:
+        return series
+    try:
+        return pd.to_numeric(series)
+    except (ValueError, TypeError):
+        return series
+
+
+def stream_packing_list(workbook, columns, c_invs=None, invoice_column="C-INVC-NO"):
+    """Read a packing-list workbook row by row without loading it into memory.
+
+    Uses openpyxl's read-only mode, so only the current row is parsed at a
+    time. Every sheet whose header has the invoice and CONTAINER_ID columns
+    (those of them that are requested) contributes rows, so summary or
+    notes sheets are skipped; other columns are never kept. With c_invs, only rows whose invoice number (compared as a
+    stripped string) is in c_invs are kept. Values are collected into one
+    buffer per column, repeated strings share a single object, and the
+    DataFrame is built from those buffers at the end.
+    """
+    from openpyxl import load_workbook
+
+    wanted = set(str(c).strip() for c in c_invs) if c_invs is not None else None
+    buffers = {column: [] for column in columns}
+    # A sheet without these is not packing-list data
+    key_columns = {invoice_column, "CONTAINER_ID"} & set(columns)
+    found = set()
+
+    wb = load_workbook(workbook, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = _find_header(rows)
+            if header is None or (wanted is not None and invoice_column not in header):
+                continue
+
+            positions = {name: i for i, name in enumerate(header) if name in buffers}
+            if not key_columns <= positions.keys():
+                continue
+            found.update(positions)
+
+            # (buffer, column position, string pool) for each projected column
+            targets = [(buffers[name], positions.get(name), {}) for name in columns]
+            invoice_pos = positions.get(invoice_column)
+            width = max(positions.values()) + 1
+
+            for row in rows:
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                if wanted is not None:
+                    invoice = row[invoice_pos]
+                    if invoice is None or str(invoice).strip() not in wanted:
+                        continue
+                elif all(row[pos] is None for pos in positions.values()):
+                    continue
+
+                for buffer, pos, pool in targets:
+                    value = row[pos] if pos is not None else None
+                    if isinstance(value, str):
+                        value = value.strip()
+                        value = pool.setdefault(value, value)
+                    buffer.append(value)
+    finally:
+        wb.close()
+
+    return pd.DataFrame({
+        column: _infer_numeric(pd.Series(buffers[column]))
+        for column in columns
+        if column in found
+    })
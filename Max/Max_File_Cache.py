@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Server metadata used to decide whether the cached copy is still current
+FileMetadata = namedtuple("FileMetadata", ["etag", "last_modified", "size"])
+
+
+def metadata_version(metadata):
+    """Return a stable version string for a file's server metadata."""
+    if metadata.etag:
+        return str(metadata.etag)
+    return f"{metadata.last_modified}:{metadata.size}"
+
+
+class SharePointClient:
+    """Reads file metadata and content through an authenticated ClientContext."""
+
+    def __init__(self, site, username, password):
+        from office365.runtime.auth.user_credential import UserCredential
+        from office365.sharepoint.client_context import ClientContext
+
+        self.ctx = ClientContext(site).with_credentials(UserCredential(username, password))
+
+    def get_metadata(self, path):
+        """Return FileMetadata for a server-relative file path."""
+        file = self.ctx.web.get_file_by_server_relative_url(path)
+        self.ctx.load(file, ["ETag", "TimeLastModified", "Length"]).execute_query()
+        return FileMetadata(
+            etag=file.properties.get("ETag"),
+            last_modified=str(file.properties.get("TimeLastModified")),
+            size=int(file.properties.get("Length", 0)),
+        )
+
+    def download(self, path, file_object):
+        """Download a server-relative file path into a binary file object."""
+        file = self.ctx.web.get_file_by_server_relative_url(path)
+        file.download(file_object).execute_query()
+
+    def list_files(self, folder):
+        """Return {server-relative path: FileMetadata} for the files in a folder."""
+        files = self.ctx.web.get_folder_by_server_relative_url(folder).files
+        self.ctx.load(files, ["ServerRelativeUrl", "ETag", "TimeLastModified", "Length"]).execute_query()
+        return {
+            file.properties["ServerRelativeUrl"]: FileMetadata(
+                etag=file.properties.get("ETag"),
+                last_modified=str(file.properties.get("TimeLastModified")),
+                size=int(file.properties.get("Length", 0)),
+            )
+            for file in files
+        }
+
+
+class LocalFileClient:
+    """Serves files from a local directory in place of SharePoint.
+
+    Used for tests, benchmarks and offline development; a server-relative
+    path resolves to the file of the same name inside root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _local_path(self, path):
+        return os.path.join(self.root, os.path.basename(path))
+
+    def get_metadata(self, path):
+        return self._metadata(os.stat(self._local_path(path)))
+
+    def _metadata(self, stat):
+        return FileMetadata(
+            etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            last_modified=str(stat.st_mtime_ns),
+            size=stat.st_size,
+        )
+
+    def download(self, path, file_object):
+        with open(self._local_path(path), "rb") as source:
+            shutil.copyfileobj(source, file_object)
+
+    def list_files(self, folder):
+        # Every folder maps onto root, like every file path does
+        with os.scandir(self.root) as entries:
+            return {
+                f"{folder.rstrip('/')}/{entry.name}": self._metadata(entry.stat())
+                for entry in entries
+                if entry.is_file()
+            }
+
+
+class FileCache:
+    """On-disk cache of remote files, revalidated against server metadata.
+
+    Metadata is checked at most once per ttl seconds; the file is downloaded
+    again only when its ETag, modification time or size changed. The client
+    is created lazily, so a fresh cache hit never authenticates. Folder
+    fetches download on a thread pool whose workers each create one client
+    on their first download and reuse it, with its connection, for the rest.
+    """
+
+    def __init__(self, client_factory, cache_dir, ttl, workers=4):
+        self.client_factory = client_factory
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.workers = workers
+        self._client = None
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def _worker_client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def _paths(self, path):
+        key = hashlib.sha1(path.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        # Keep the extension; openpyxl refuses files it does not recognise
+        return base + (os.path.splitext(path)[1] or ".bin"), base + ".json"
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta_path, meta):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _cached(self, path):
+        """Return (data_path, meta_path, cached meta or None) for a remote file."""
+        data_path, meta_path = self._paths(path)
+        cached = self._read_meta(meta_path)
+        if cached is not None and not os.path.exists(data_path):
+            cached = None
+        return data_path, meta_path, cached
+
+    def _update(self, get_client, path, metadata, now):
+        """Download path unless the cached copy matches metadata; get_client() supplies the client."""
+        data_path, meta_path, cached = self._cached(path)
+        version = metadata_version(metadata)
+        if cached is None or cached["version"] != version or cached["size"] != metadata.size:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    get_client().download(path, f)
+                os.replace(tmp_path, data_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        self._write_meta(meta_path, {
+            "path": path,
+            "version": version,
+            "etag": metadata.etag,
+            "last_modified": metadata.last_modified,
+            "size": metadata.size,
+            "checked_at": now,
+        })
+        return data_path, version
+
+    def fetch(self, path):
+        """Return (local_path, version) for a remote file, downloading if changed."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, _, cached = self._cached(path)
+
+        now = time.time()
+        if cached is not None and now - cached["checked_at"] < self.ttl:
+            return data_path, cached["version"]
+
+        try:
+            metadata = self.client.get_metadata(path)
+        except Exception:
+            # Keep serving the last good copy when the server is unreachable
+            if cached is not None:
+                return data_path, cached["version"]
+            raise
+        return self._update(lambda: self.client, path, metadata, now)
+
+    def _cached_listing(self, listing):
+        """Return {path: (local_path, version)} for a stored listing, if all files are cached."""
+        if listing is None:
+            return None
+        fetched = {}
+        for path in listing["files"]:
+            data_path, _, meta = self._cached(path)
+            if meta is None:
+                return None
+            fetched[path] = (data_path, meta["version"])
+        return fetched
+
+    def fetch_folder(self, folder, suffixes=(".xlsx",)):
+        """Return {path: (local_path, version)} for the files of a remote folder.
+
+        The folder is listed once per ttl; files whose version is unchanged
+        are served from the cache and the rest are downloaded in parallel.
+        Only names ending in one of suffixes are included.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _, listing_path = self._paths(folder)
+        listing = self._read_meta(listing_path)
+
+        cached = self._cached_listing(listing)
+
+        now = time.time()
+        if cached is not None and now - listing["checked_at"] < self.ttl:
+            return cached
+
+        try:
+            files = self.client.list_files(folder)
+        except Exception:
+            # Keep serving the last good copies when the server is unreachable
+            if cached is not None:
+                return cached
+            raise
+
+        files = {
+            path: metadata for path, metadata in sorted(files.items())
+            if path.lower().endswith(tuple(suffix.lower() for suffix in suffixes))
+            and not os.path.basename(path).startswith("~$")
+        }
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="max-download") as pool:
+            futures = {
+                path: pool.submit(self._update, self._worker_client, path, metadata, now)
+                for path, metadata in files.items()
+            }
+            fetched = {path: future.result() for path, future in futures.items()}
+
+        self._write_meta(listing_path, {"path": folder, "files": list(fetched), "checked_at": now})
+        return fetched
@@ -0,0 +1,153 @@
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Instrumentation is off unless MAX_METRICS=1 or a session opens the page with ?diag=1
+METRICS_ENABLED = os.environ.get("MAX_METRICS", "") == "1"
+# Samples kept per stage; older ones are overwritten
+RING_SIZE = int(os.environ.get("MAX_METRICS_RING_SIZE", "4096"))
+# Where exports and ?profile=1 dumps are written
+METRICS_DIR = os.environ.get("MAX_METRICS_DIR", os.path.join("data", "metrics"))
+# When set, a .prom or .csv file rewritten at most every EXPORT_INTERVAL_SECONDS
+METRICS_EXPORT_PATH = os.environ.get("MAX_METRICS_EXPORT")
+EXPORT_INTERVAL_SECONDS = 15.0
+
+QUANTILES = (50, 95, 99)
+STATS_COLUMNS = ["Stage", "Count", "p50 ms", "p95 ms", "p99 ms", "Max ms"]
+
+
+class LatencyRecorder:
+    """Per-stage ring buffers of wall times, shared by every session.
+
+    record() writes one float into a preallocated array under a lock, so the
+    cost per measured call is well under a microsecond; percentiles are only
+    computed when someone looks at them.
+    """
+
+    def __init__(self, capacity=RING_SIZE, enabled=METRICS_ENABLED):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._exported_at = 0.0
+
+    def record(self, stage, seconds):
+        with self._lock:
+            ring = self._stages.get(stage)
+            if ring is None:
+                # [samples, samples written, total seconds]
+                ring = self._stages[stage] = [np.zeros(self.capacity), 0, 0.0]
+            ring[0][ring[1] % self.capacity] = seconds
+            ring[1] += 1
+            ring[2] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def stats(self):
+        """Return count, p50/p95/p99 and max per stage, in milliseconds."""
+        with self._lock:
+            rings = {stage: (ring[0][:min(ring[1], self.capacity)].copy(), ring[1])
+                     for stage, ring in self._stages.items()}
+        rows = []
+        for stage, (samples, count) in sorted(rings.items()):
+            p50, p95, p99 = np.percentile(samples, QUANTILES) * 1000
+            rows.append([stage, count, p50, p95, p99, samples.max() * 1000])
+        return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+    def to_prometheus(self):
+        """Return the stats in Prometheus text exposition format (as a summary)."""
+        with self._lock:
+            rings = {stage: (ring[0][:min(ring[1], self.capacity)].copy(), ring[1], ring[2])
+                     for stage, ring in self._stages.items()}
+        lines = [
+            "# HELP max_stage_seconds Wall time of Max page stages.",
+            "# TYPE max_stage_seconds summary",
+        ]
+        for stage, (samples, count, total) in sorted(rings.items()):
+            for q, value in zip(QUANTILES, np.percentile(samples, QUANTILES)):
+                lines.append(f'max_stage_seconds{{stage="{stage}",quantile="{q / 100:g}"}} {value:.6f}')
+            lines.append(f'max_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'max_stage_seconds_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def to_csv(self):
+        return self.stats().to_csv(index=False, float_format="%.3f")
+
+    def export(self, path):
+        """Write the stats to path: CSV for .csv, Prometheus text otherwise."""
+        text = self.to_csv() if path.endswith(".csv") else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+    def export_periodically(self, path=METRICS_EXPORT_PATH):
+        """Export to path if it is set and the last export is old enough."""
+        if not path or not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._exported_at >= EXPORT_INTERVAL_SECONDS:
+            self._exported_at = now
+            self.export(path)
+
+
+RECORDER = LatencyRecorder()
+
+
+def timed(stage):
+    """Decorator recording the wall time of each call under stage, when enabled."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not RECORDER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                RECORDER.record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_since(stage, start):
+    """Record the wall time since start (a time.perf_counter() value), when enabled."""
+    if RECORDER.enabled:
+        RECORDER.record(stage, time.perf_counter() - start)
+
+
+def profile_call(func, directory=METRICS_DIR):
+    """Run func under cProfile; return (pstats dump path, top functions as text).
+
+    The dump is written even when func stops the script early (st.rerun,
+    st.stop); the exception then propagates as usual.
+    """
+    # Only needed with ?profile=1, so kept off the page's import path
+    import cProfile
+    import io
+    import pstats
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"rerun-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        func()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(25)
+    return path, summary.getvalue()
@@ -0,0 +1,60 @@
+import pandas as pd
+
+PROGRESS_COLUMNS = ["Scan_Carton_No", "Expected", "Scanned", "Remaining", "Duplicates"]
+
+
+class ProgressTracker:
+    """Expected vs scanned carton counters per Scan_Carton_No and per invoice.
+
+    Seeded once from the invoice's ScanIndex; every scan updates the counters
+    in O(1), so nothing rescans a DataFrame to show progress.
+    """
+
+    def __init__(self, expected_by_pallet):
+        self.expected = dict(expected_by_pallet)
+        self.scanned = dict.fromkeys(self.expected, 0)
+        self.duplicates = dict.fromkeys(self.expected, 0)
+        self.total_expected = sum(self.expected.values())
+        self.total_scanned = 0
+        self.total_duplicates = 0
+        self._seen = set()
+
+    @classmethod
+    def from_scan_index(cls, scan_index):
+        return cls(scan_index.expected_by_pallet)
+
+    @property
+    def total_remaining(self):
+        return self.total_expected - self.total_scanned
+
+    def remaining(self, scan_carton_no):
+        return self.expected.get(scan_carton_no, 0) - self.scanned.get(scan_carton_no, 0)
+
+    def record(self, code, scan_carton_no):
+        """Count a resolved scan; return True if the carton was already scanned."""
+        if code in self._seen:
+            self.duplicates[scan_carton_no] = self.duplicates.get(scan_carton_no, 0) + 1
+            self.total_duplicates += 1
+            return True
+        self._seen.add(code)
+        self.scanned[scan_carton_no] = self.scanned.get(scan_carton_no, 0) + 1
+        self.total_scanned += 1
+        return False
+
+    def pallet_summary(self, scan_carton_no):
+        """Return 'scanned/expected' for one pallet."""
+        return f"{self.scanned.get(scan_carton_no, 0)}/{self.expected.get(scan_carton_no, 0)}"
+
+    def table(self, active_only=True):
+        """Return the counters as a DataFrame, by default only pallets with scans."""
+        pallets = [
+            p for p in self.expected
+            if not active_only or self.scanned[p] or self.duplicates.get(p)
+        ]
+        return pd.DataFrame({
+            "Scan_Carton_No": pallets,
+            "Expected": [self.expected[p] for p in pallets],
+            "Scanned": [self.scanned[p] for p in pallets],
+            "Remaining": [self.expected[p] - self.scanned[p] for p in pallets],
+            "Duplicates": [self.duplicates.get(p, 0) for p in pallets],
+        }, columns=PROGRESS_COLUMNS)
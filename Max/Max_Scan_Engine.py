@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from Max.Max_Container_Search import CANDIDATE_LIMIT
+from Max.Max_Progress import ProgressTracker
+from Max.Max_Scan_Index import normalize_code
+
+# Port of the local scan endpoint started next to the Streamlit app (0 disables)
+SCAN_SERVER_PORT = int(os.environ.get("MAX_SCAN_SERVER_PORT", "0"))
+SCAN_SERVER_HOST = os.environ.get("MAX_SCAN_SERVER_HOST", "127.0.0.1")
+
+logger = logging.getLogger(__name__)
+
+# Outcome of one scan; c_inv is the invoice it was recorded against and
+# candidates the IDs offered when the code matched nothing
+ScanResult = namedtuple(
+    "ScanResult",
+    ["code", "c_inv", "status", "status_type", "pallet", "suggested_c_inv", "duplicate", "candidates"],
+)
+# A container ID a damaged or partial scan may have meant, and its invoice
+ScanCandidate = namedtuple("ScanCandidate", ["code", "match", "c_inv"])
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def match_pallet(entry, code):
+    """Return (pallet, status, status_type) for a code found in the invoice."""
+    scan_carton_no = entry.scan_carton_no
+    if scan_carton_no is not None:
+        return scan_carton_no, f"Pallet - {scan_carton_no}", "success"
+    return None, f"MISMATCH: {code} not found in pallet", "danger"
+
+
+class ScanEngine:
+    """Resolves scans against the shared snapshot, independent of any UI.
+
+    Progress is kept per invoice and row fingerprint and shared by every
+    station scanning it; updates to an invoice's counters and its ledger
+    entries happen under that invoice's lock, so stations on different
+    invoices never contend.
+    """
+
+    def __init__(self, store, ledger=None):
+        self.store = store
+        self.ledger = ledger
+        # (C-INV, fingerprint) -> (ProgressTracker, ScanIndex it counts against)
+        self._progress = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def invoice_lock(self, c_inv):
+        with self._lock:
+            return self._locks.setdefault(c_inv, threading.Lock())
+
+    def progress(self, snapshot, c_inv):
+        """Return the shared ProgressTracker for a C-INV of a snapshot.
+
+        Seeded from every station's ledger entries the first time a version
+        of the invoice's rows is scanned. Stations still on an older snapshot
+        keep their own tracker, so nothing is rebuilt as they alternate with
+        stations on the newer one.
+        """
+        key = (c_inv, snapshot.fingerprints.get(c_inv))
+        current = self._progress.get(key)
+        if current is not None:
+            return current[0]
+
+        with self.invoice_lock(c_inv):
+            current = self._progress.get(key)
+            if current is None:
+                scan_index = snapshot.get_invoice(c_inv).scan_index
+                tracker = ProgressTracker.from_scan_index(scan_index)
+                if self.ledger is not None:
+                    # Resolve each scan against these rows: a carton may have
+                    # moved invoice or pallet since it was recorded
+                    for entry in self.ledger.invoice_history(c_inv):
+                        if entry.status_type != "success":
+                            continue
+                        found = scan_index.lookup(entry.code)
+                        if found is not None and found.scan_carton_no is not None:
+                            tracker.record(entry.code, found.scan_carton_no)
+                current = (tracker, scan_index)
+                # Keep only the versions in use: this one and the store's current one
+                latest = self.store.current
+                keep = {key[1], latest.fingerprints.get(c_inv) if latest is not None else None}
+                with self._lock:
+                    for other in [other for other in self._progress if other[0] == c_inv and other[1] not in keep]:
+                        del self._progress[other]
+                    self._progress[key] = current
+        return current[0]
+
+    def is_warm(self, snapshot, c_inv):
+        """Return True if scanning a C-INV needs no index build or ledger read."""
+        return (
+            snapshot.cache_key(c_inv) in snapshot.cache
+            and (c_inv, snapshot.fingerprints.get(c_inv)) in self._progress
+        )
+
+    def _trackers(self, c_inv):
+        """Return every live (ProgressTracker, ScanIndex) of a C-INV."""
+        with self._lock:
+            return [current for key, current in self._progress.items() if key[0] == c_inv]
+
+    def resolve_c_inv(self, value, snapshot=None):
+        """Map a C-INV given as text (e.g. from JSON) to the snapshot's label, or None."""
+        snapshot = snapshot or self.store.current
+        for c_inv in snapshot.c_inv_list:
+            if c_inv == value or str(c_inv) == str(value):
+                return c_inv
+        return None
+
+    def scan(self, station, c_inv, code, auto_switch=False, snapshot=None):
+        """Resolve one scan, count it and record it in the ledger."""
+        snapshot = snapshot or self.store.current
+        code = normalize_code(code)
+        if not code:
+            return ScanResult(code, c_inv, "EMPTY SCAN", "danger", None, None, False, ())
+
+        # Single dict lookup against the prebuilt invoice index
+        entry = snapshot.get_invoice(c_inv).scan_index.lookup(code)
+
+        # Not in this invoice: find which C-INV the carton belongs to
+        suggested_c_inv = None
+        if entry is None:
+            located = snapshot.carton_index.lookup(code)
+            if located is not None and auto_switch:
+                c_inv = located[0]
+                entry = snapshot.get_invoice(c_inv).scan_index.lookup(code)
+            elif located is not None:
+                suggested_c_inv = located[0]
+
+        pallet, duplicate, candidates = None, False, ()
+        if entry is None and suggested_c_inv is not None:
+            status, status_type = f"WRONG C-INV: {code} is in {suggested_c_inv}", "warning"
+        elif entry is None:
+            status, status_type = f"MISMATCH: {code} not found", "danger"
+            candidates = self.candidates(snapshot, c_inv, code)
+        else:
+            pallet, status, status_type = match_pallet(entry, code)
+
+        progress = self.progress(snapshot, c_inv) if pallet is not None else None
+        with self.invoice_lock(c_inv):
+            if progress is not None and progress.record(code, pallet):
+                duplicate = True
+                status = f"{status} (DUPLICATE)"
+            if progress is not None:
+                # Count it for stations on other versions of the invoice too
+                for tracker, scan_index in self._trackers(c_inv):
+                    other = scan_index.lookup(code) if tracker is not progress else None
+                    if other is not None and other.scan_carton_no is not None:
+                        tracker.record(code, other.scan_carton_no)
+            if self.ledger is not None:
+                self.ledger.append(station, c_inv, code, pallet, status, status_type)
+        return ScanResult(code, c_inv, status, status_type, pallet, suggested_c_inv, duplicate, candidates)
+
+    def candidates(self, snapshot, c_inv, code, limit=CANDIDATE_LIMIT):
+        """Return ScanCandidates for a partial or damaged code.
+
+        The selected invoice's containers come first; other invoices fill
+        the remaining places from the snapshot-wide search.
+        """
+        found = [
+            ScanCandidate(candidate, match, c_inv)
+            for candidate, match in snapshot.get_invoice(c_inv).search.search(code, limit)
+        ]
+        if len(found) < limit:
+            seen = {candidate.code for candidate in found}
+            for candidate, match in snapshot.carton_search.search(code, limit + len(found)):
+                if candidate not in seen and len(found) < limit:
+                    found.append(ScanCandidate(candidate, match, snapshot.carton_index.lookup(candidate)[0]))
+        return tuple(found)
+
+
+def _json_default(value):
+    # numpy scalars from the packing list
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class ScanServer:
+    """Local HTTP/1.1 JSON endpoint in front of a ScanEngine, built on asyncio.
+
+    Connections are kept alive, so a scanner station pays one TCP handshake
+    and then a single request per scan:
+
+        POST /scan       {"station": ..., "c_inv": ..., "code": ..., "auto_switch": false}
+        GET  /progress?c_inv=...
+        GET  /health
+
+    A MISMATCH response lists candidate IDs for a partial or damaged code.
+    """
+
+    def __init__(self, engine, host=SCAN_SERVER_HOST, port=SCAN_SERVER_PORT):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.ready = threading.Event()
+        self.error = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def serve(self):
+        """Serve until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            # e.g. the port is taken; start() raises it in the caller's thread
+            self.error = e
+            raise
+        finally:
+            self.ready.set()
+        logger.info("Scan endpoint listening on %s:%d", self.host, self.port)
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def start(self):
+        """Serve from a daemon thread with its own event loop.
+
+        Raises OSError if the endpoint cannot listen, e.g. on a port in use.
+        """
+        self._thread = threading.Thread(target=self._run, name="max-scan-server", daemon=True)
+        self._thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        try:
+            asyncio.run(self.serve())
+        except OSError:
+            # Already handed to start()
+            pass
+
+    def stop(self):
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                code, payload = await self._route(method, target, body)
+                data = json.dumps(payload, default=_json_default).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {code} {HTTP_REASONS[code]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        snapshot = self.engine.store.current
+        if snapshot is None:
+            return 404, {"error": "no packing list loaded"}
+
+        if url.path == "/health":
+            return 200, {"version": snapshot.version, "invoices": len(snapshot.c_inv_list)}
+
+        if url.path == "/scan":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                return 400, {"error": "body is not JSON"}
+            if not isinstance(request, dict):
+                return 400, {"error": "body is not a JSON object"}
+            c_inv = self.engine.resolve_c_inv(request.get("c_inv"), snapshot)
+            if c_inv is None:
+                return 404, {"error": f"unknown C-INV {request.get('c_inv')}"}
+            auto_switch = bool(request.get("auto_switch"))
+            args = (request.get("station", "http"), c_inv, str(request.get("code", "")), auto_switch, snapshot)
+            # Building an invoice's artifacts or seeding its progress from the
+            # ledger can take seconds; keep it off the loop. An auto-switch
+            # scan may land on any invoice, so it always leaves the loop
+            if not auto_switch and self.engine.is_warm(snapshot, c_inv):
+                result = self.engine.scan(*args)
+            else:
+                result = await self._loop.run_in_executor(None, self.engine.scan, *args)
+            payload = result._asdict()
+            payload["candidates"] = [candidate._asdict() for candidate in result.candidates]
+            return 200, payload
+
+        if url.path == "/progress":
+            c_inv = self.engine.resolve_c_inv(parse_qs(url.query).get("c_inv", [None])[0], snapshot)
+            if c_inv is None:
+                return 404, {"error": "unknown C-INV"}
+            progress = await self._loop.run_in_executor(None, self.engine.progress, snapshot, c_inv)
+            return 200, {
+                "c_inv": c_inv,
+                "expected": progress.total_expected,
+                "scanned": progress.total_scanned,
+                "remaining": progress.total_remaining,
+                "duplicates": progress.total_duplicates,
+            }
+
+        return 404, {"error": f"no route {url.path}"}
+
+
+def main():
+    """Run the scan endpoint on its own, without the Streamlit app."""
+    from Max.Max_Data_IN import fetch_packing_lists, load_packing_list, read_packing_lists
+    from Max.Max_Scan_Ledger import LEDGER_PATH, ScanLedger
+    from Max.Max_Snapshot import REFRESH_INTERVAL_SECONDS, SnapshotRefresher, SnapshotStore
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default=SCAN_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SCAN_SERVER_PORT or 8765)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = SnapshotStore()
+    store.get(load_packing_list)
+    SnapshotRefresher(store, fetch_packing_lists, read_packing_lists, REFRESH_INTERVAL_SECONDS).start()
+    engine = ScanEngine(store, ScanLedger(LEDGER_PATH))
+    asyncio.run(ScanServer(engine, args.host, args.port).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import sys
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from Max.Max_Data_IN import clean_columns
+
+# Everything the Max page needs to display for one scanned container
+ScanEntry = namedtuple(
+    "ScanEntry",
+    ["scan_carton_no", "items", "price", "style", "color", "total_containers"],
+)
+
+
+def normalize_code(code):
+    """Normalize a scanned or stored container ID for lookups."""
+    return str(code).strip().upper()
+
+
+def _factorize(values):
+    """Return (int32 codes, list of distinct values), keeping missing values as a value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes.astype(np.int32), uniques.tolist()
+
+
+class ScanIndex:
+    """Per-invoice container lookup, built once when the C-INV changes.
+
+    Stored column-wise: container IDs live in one hashed pandas Index and
+    every ScanEntry field is an int32 code into a short list of distinct
+    values, so an invoice costs a few bytes per container. lookup()
+    assembles the ScanEntry of the one container scanned.
+    """
+
+    def __init__(self, keys, codes, labels):
+        self.keys = keys
+        self.codes = codes
+        self.labels = labels
+        self._table = None
+        self._expected_by_pallet = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, code):
+        return normalize_code(code) in self.keys
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the index, for cache accounting."""
+        size = int(self.keys.memory_usage(deep=True))
+        for field in ScanEntry._fields:
+            size += self.codes[field].nbytes + sum(sys.getsizeof(v) for v in self.labels[field])
+        return size
+
+    def _column(self, field):
+        return np.asarray(self.labels[field], dtype=object).take(self.codes[field])
+
+    @property
+    def table(self):
+        """Entries as a DataFrame indexed by container ID, for batch joins."""
+        if self._table is None:
+            displays = np.array(
+                [self.item_display(ScanEntry(None, items, None, None, None, None))
+                 for items in self.labels["items"]],
+                dtype=object,
+            )
+            self._table = pd.DataFrame({
+                "Scan_Carton_No": self._column("scan_carton_no"),
+                "Item": displays.take(self.codes["items"]),
+                "Style": self._column("style"),
+                "Color": self._column("color"),
+            }, index=self.keys.rename("CONTAINER_ID"))
+        return self._table
+
+    @property
+    def expected_by_pallet(self):
+        """Number of containers allocated to each Scan_Carton_No."""
+        if self._expected_by_pallet is None:
+            counts = np.bincount(self.codes["scan_carton_no"], minlength=len(self.labels["scan_carton_no"]))
+            self._expected_by_pallet = Counter({
+                pallet: int(count)
+                for pallet, count in zip(self.labels["scan_carton_no"], counts)
+                if pallet is not None
+            })
+        return self._expected_by_pallet
+
+    def lookup(self, code):
+        """Return the ScanEntry for a container ID, or None."""
+        try:
+            pos = self.keys.get_loc(normalize_code(code))
+        except KeyError:
+            return None
+        return ScanEntry._make(
+            self.labels[field][self.codes[field][pos]] for field in ScanEntry._fields
+        )
+
+    @staticmethod
+    def item_display(entry):
+        """Return the item code to show, or MIXED for multi-item cartons."""
+        return "MIXED" if len(entry.items) > 1 else entry.items[0]
+
+
+def build_scan_index(filtered_df, cartons):
+    """Build a ScanIndex from an invoice's rows and its carton allocation."""
+    df = clean_columns(filtered_df, ["CONTAINER_ID", "ITEM", "VPN", "DIFF_1"], upper=["CONTAINER_ID"])
+
+    # Scan carton number comes from the first row of each container,
+    # matching how a scan has always been resolved; allocate_cartons lists
+    # containers the same way, so its rows line up with these
+    first = ~df["CONTAINER_ID"].duplicated().to_numpy()
+    keys = pd.Index(df["CONTAINER_ID"].to_numpy()[first], dtype=object)
+    if not np.array_equal(keys.to_numpy(), cartons["CONTAINER_ID"].to_numpy()):
+        raise ValueError("cartons do not match the invoice's containers")
+
+    # A container's distinct items in order of appearance. Single-item
+    # containers share their item's 1-tuple; mixed ones share a tuple per
+    # distinct item combination
+    pairs = df[["CONTAINER_ID", "ITEM"]].drop_duplicates()
+    item_codes, item_labels = pd.factorize(pairs["ITEM"])
+    item_sets = [(item,) for item in item_labels.tolist()]
+    # Containers holding each item set
+    totals = np.bincount(item_codes, minlength=len(item_sets)).tolist()
+    set_codes = item_codes[~pairs["CONTAINER_ID"].duplicated().to_numpy()].astype(np.int32)
+
+    mixed = pairs["CONTAINER_ID"].duplicated(keep=False).to_numpy()
+    if mixed.any():
+        grouped = {}
+        for container_id, item in zip(pairs["CONTAINER_ID"][mixed].tolist(), pairs["ITEM"][mixed].tolist()):
+            grouped[container_id] = grouped.get(container_id, ()) + (item,)
+        mixed_items = pairs[pairs["ITEM"].isin(set(pairs["ITEM"][mixed]))]
+        item_containers = {}
+        for container_id, item in zip(mixed_items["CONTAINER_ID"].tolist(), mixed_items["ITEM"].tolist()):
+            item_containers.setdefault(item, set()).add(container_id)
+
+        set_index = {}
+        for pos, items in zip(keys.get_indexer(list(grouped)), grouped.values()):
+            code = set_index.get(items)
+            if code is None:
+                code = set_index[items] = len(item_sets)
+                item_sets.append(items)
+                # Containers holding any of the mixed items, counted once
+                totals.append(len(set().union(*(item_containers[i] for i in items))))
+            set_codes[pos] = code
+
+    if "PRICE" in filtered_df.columns:
+        prices = filtered_df["PRICE"].to_numpy()[first]
+    else:
+        prices = np.full(len(keys), "N/A", dtype=object)
+
+    codes, labels = {}, {}
+    codes["scan_carton_no"], labels["scan_carton_no"] = _factorize(cartons["Scan_Carton_No"].to_numpy())
+    codes["items"], labels["items"] = set_codes, item_sets
+    codes["price"], labels["price"] = _factorize(prices)
+    codes["style"], labels["style"] = _factorize(df["VPN"].to_numpy()[first])
+    codes["color"], labels["color"] = _factorize(df["DIFF_1"].to_numpy()[first])
+    codes["total_containers"], labels["total_containers"] = set_codes, totals
+
+    return ScanIndex(keys, codes, labels)
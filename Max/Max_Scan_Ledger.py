@@ -0,0 +1,158 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# Durable scan log; keep it outside temporary directories in production
+LEDGER_PATH = os.environ.get("MAX_LEDGER_PATH", os.path.join("data", "scan_ledger.sqlite3"))
+
+logger = logging.getLogger(__name__)
+
+LedgerEntry = namedtuple(
+    "LedgerEntry", ["timestamp", "station", "c_inv", "code", "pallet", "status", "status_type"]
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    station TEXT NOT NULL,
+    c_inv TEXT NOT NULL,
+    code TEXT NOT NULL,
+    pallet TEXT,
+    status TEXT,
+    status_type TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_station_c_inv ON scans (station, c_inv, id);
+CREATE INDEX IF NOT EXISTS scans_c_inv ON scans (c_inv, id);
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ScanLedger:
+    """Append-only SQLite scan log in WAL mode, shared by every session.
+
+    append() only queues the entry; a writer thread commits queued entries
+    in groups, so recording a scan never waits on the disk. Reads flush
+    first, which cuts the writer's grouping window short.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=0.25):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._read_conn = _connect(path)
+        self._read_conn.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="max-scan-ledger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def append(self, station, c_inv, code, pallet, status, status_type):
+        """Queue a scan for the ledger and return immediately."""
+        self._queue.put(LedgerEntry(
+            datetime.now().isoformat(timespec="milliseconds"),
+            str(station), str(c_inv), code,
+            None if pallet is None else str(pallet), status, status_type,
+        ))
+
+    def flush(self):
+        """Commit every queued scan now and wait for it."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        # The writer stops at close(); don't wait on it forever if it already has
+        while not done.wait(self.flush_interval):
+            if not self._writer.is_alive():
+                return
+
+    def recent(self, station, c_inv, limit):
+        """Return the station's last `limit` scans for a C-INV, newest first."""
+        self.flush()
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT timestamp, station, c_inv, code, pallet, status, status_type "
+                "FROM scans WHERE station = ? AND c_inv = ? ORDER BY id DESC LIMIT ?",
+                (str(station), str(c_inv), limit),
+            ).fetchall()
+        return [LedgerEntry(*row) for row in rows]
+
+    def history(self, station, c_inv):
+        """Return every scan of the station for a C-INV, oldest first."""
+        self.flush()
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT timestamp, station, c_inv, code, pallet, status, status_type "
+                "FROM scans WHERE station = ? AND c_inv = ? ORDER BY id",
+                (str(station), str(c_inv)),
+            ).fetchall()
+        return [LedgerEntry(*row) for row in rows]
+
+    def invoice_history(self, c_inv):
+        """Return every station's scans for a C-INV, oldest first."""
+        self.flush()
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT timestamp, station, c_inv, code, pallet, status, status_type "
+                "FROM scans WHERE c_inv = ? ORDER BY id",
+                (str(c_inv),),
+            ).fetchall()
+        return [LedgerEntry(*row) for row in rows]
+
+    def close(self):
+        """Commit anything still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._read_conn.close()
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Group whatever else arrives within flush_interval into one commit
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                # A flush (Event) or close (None) commits what is queued right away
+                while len(batch) < self.batch_size and isinstance(batch[-1], LedgerEntry):
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                pass
+
+            entries = [entry for entry in batch if isinstance(entry, LedgerEntry)]
+            stopping = None in batch
+            try:
+                if entries:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO scans (timestamp, station, c_inv, code, pallet, status, status_type) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            entries,
+                        )
+            except sqlite3.Error:
+                logger.exception("Failed to write %d scans to the ledger", len(entries))
+            finally:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+        conn.close()
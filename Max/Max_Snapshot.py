@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from Max.Max_Cache import ArtifactCache
+from Max.Max_Carton_Index import build_carton_index
+from Max.Max_Container_Search import ContainerSearch
+from Max.Max_Data_IN import allocate_invoice, get_filtered_data
+from Max.Max_Scan_Index import build_scan_index
+from Max.Max_Summary import PalletSummary
+
+# Derived per-C-INV data, shared read-only by every session on the invoice
+InvoiceArtifacts = namedtuple(
+    "InvoiceArtifacts", ["filtered_df", "final_df", "scan_index", "summary", "search"]
+)
+
+# Memory budget for invoice artifacts across all snapshots
+ARTIFACT_CACHE_BYTES = int(float(os.environ.get("MAX_ARTIFACT_CACHE_MB", "512")) * 1024 * 1024)
+# Cartons of one item per pallet before a slot is split; part of every artifact cache key
+MAX_PER_ITEM = 15
+# How often the background refresher checks SharePoint for a new version (0 disables)
+REFRESH_INTERVAL_SECONDS = float(os.environ.get("MAX_REFRESH_INTERVAL_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+def build_invoice(data, c_inv, max_per_item=MAX_PER_ITEM):
+    """Build the InvoiceArtifacts for one C-INV of a packing list."""
+    filtered_df = get_filtered_data(c_inv, data)
+    cartons, final_df = allocate_invoice(filtered_df, max_per_item)
+    scan_index = build_scan_index(filtered_df, cartons)
+    return InvoiceArtifacts(
+        filtered_df, final_df, scan_index, PalletSummary(final_df), ContainerSearch(scan_index.keys)
+    )
+
+
+def invoice_fingerprints(data):
+    """Return {C-INV: digest} of each invoice's rows, in row order."""
+    row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    codes, labels = pd.factorize(data["C-INVC-NO"])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return {
+        label: hashlib.blake2b(row_hashes[order[start:end]].tobytes(), digest_size=16).hexdigest()
+        for label, start, end in zip(labels, bounds[:-1], bounds[1:])
+    }
+
+
+class Snapshot:
+    """One version of the packing list, shared read-only across sessions.
+
+    Nothing reachable from a snapshot may be mutated by a session; sessions
+    keep a reference and hold only their own scan state.
+    """
+
+    def __init__(self, version, data, cache):
+        self.version = version
+        self.data = data
+        self.cache = cache
+        self.c_inv_list = sorted(data["C-INVC-NO"].dropna().unique())
+        # Every carton of every invoice, so a scan resolves whatever is selected
+        self.carton_index = build_carton_index(data, MAX_PER_ITEM)
+        self.carton_search = ContainerSearch(self.carton_index.keys)
+        self.fingerprints = invoice_fingerprints(data)
+
+    def cache_key(self, c_inv):
+        return (self.version, c_inv, MAX_PER_ITEM)
+
+    def get_invoice(self, c_inv):
+        """Return the InvoiceArtifacts for a C-INV, building them once."""
+        return self.cache.get_or_build(
+            self.cache_key(c_inv),
+            lambda: build_invoice(self.data, c_inv),
+        )
+
+
+class SnapshotStore:
+    """Process-wide holder of the current packing-list snapshot."""
+
+    def __init__(self, cache=None):
+        self.current = None
+        self.cache = cache if cache is not None else ArtifactCache(ARTIFACT_CACHE_BYTES)
+        self._lock = threading.Lock()
+
+    def get(self, loader):
+        """Return the current snapshot, loading it with loader() on first use.
+
+        loader returns a (DataFrame, version) pair, or None on failure.
+        """
+        snapshot = self.current
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self.current is None:
+                loaded = loader()
+                if loaded is None:
+                    return None
+                data, version = loaded
+                self.current = Snapshot(version, data, self.cache)
+            return self.current
+
+    def swap(self, data, version):
+        """Index a new packing-list version and make it current atomically.
+
+        Invoices whose rows are unchanged reuse the previous version's
+        artifacts; changed invoices that were in use are rebuilt here, before
+        the swap, so no session pays for them. Sessions keep their pinned
+        snapshot until they adopt the new one.
+        """
+        new = Snapshot(version, data, self.cache)
+        old = self.current
+        if old is not None:
+            for c_inv, fingerprint in new.fingerprints.items():
+                artifacts = self.cache.get(old.cache_key(c_inv))
+                if artifacts is None:
+                    continue
+                if old.fingerprints.get(c_inv) == fingerprint:
+                    self.cache.put(new.cache_key(c_inv), artifacts)
+                else:
+                    new.get_invoice(c_inv)
+
+        with self._lock:
+            self.current = new
+        return new
+
+
+class SnapshotRefresher:
+    """Daemon thread that polls for a new packing-list version and swaps it in.
+
+    fetch() returns (source, version) and read(source) the packing list.
+    """
+
+    def __init__(self, store, fetch, read, interval):
+        self.store = store
+        self.fetch = fetch
+        self.read = read
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="max-snapshot-refresher", daemon=True)
+
+    def start(self):
+        if self.interval > 0:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self):
+        """Check once for a new version; return True if a new snapshot was swapped in."""
+        source, version = self.fetch()
+        current = self.store.current
+        if current is not None and current.version == version:
+            return False
+        self.store.swap(self.read(source), version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.refresh():
+                    logger.info("Swapped in packing list version %s", self.store.current.version)
+            except Exception:
+                logger.exception("Packing list refresh failed")
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+SUMMARY_COLUMNS = ["Main_No", "VPN:Color", "Items", "Slots", "Cartons", "Scanned", "Remaining"]
+DETAIL_COLUMNS = ["Scan_Carton_No", "Sub_No", "Pallet_No", "Item", "Cartons", "Scanned", "Remaining"]
+STATUS_FILTERS = ["All", "Not started", "In progress", "Complete"]
+# Pallets (Main_No groups) sent to the browser per page
+PAGE_SIZE = 50
+
+
+class PalletSummary:
+    """Per-Main_No aggregates of an invoice's allocation, built once per invoice.
+
+    Counts that do not change with scanning (items, slots, cartons, the
+    VPN:color) are computed here; scanned progress is folded in per request
+    from the shared ProgressTracker. Pages and drill-downs are cut on the
+    server, so the browser only receives the rows it shows.
+    """
+
+    def __init__(self, final_df):
+        self.final_df = final_df
+        grouped = final_df.groupby("Main_No", sort=True)
+        # Each Main_No's distinct items, space-separated, in order of appearance
+        pairs = final_df[["Main_No", "Item"]].drop_duplicates()
+        items = {}
+        for main_no, item in zip(pairs["Main_No"].tolist(), pairs["Item"].astype(str).tolist()):
+            items[main_no] = f"{items[main_no]} {item}" if main_no in items else item
+        main_nos = grouped.size().index
+        self.table = pd.DataFrame({
+            "Main_No": main_nos.to_numpy(),
+            "VPN:Color": grouped["VPNs_combined"].first().to_numpy(),
+            "Items": pairs.groupby("Main_No", sort=True).size().to_numpy(),
+            "Slots": grouped.size().to_numpy(),
+            "Cartons": grouped["Cartons"].sum().to_numpy(),
+        })
+        # Row of self.table for each Scan_Carton_No, and final_df rows per Main_No
+        main_rows = pd.Index(self.table["Main_No"]).get_indexer(final_df["Main_No"])
+        self._slot_rows = dict(zip(final_df["Scan_Carton_No"].tolist(), main_rows.tolist()))
+        self._rows_by_main = grouped.indices
+        # Lower-cased text the filter box matches: Main_No, VPN:color and items
+        self._search = (
+            self.table["Main_No"].astype(str) + " "
+            + self.table["VPN:Color"].astype(str) + " "
+            + pd.Series([items[main_no] for main_no in main_nos.tolist()])
+        ).str.lower()
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held beyond final_df, for cache accounting."""
+        return int(self.table.memory_usage(deep=True).sum() + self._search.memory_usage(deep=True))
+
+    def _progress_by_main(self, progress):
+        """Return (expected, scanned) carton counts per Main_No row."""
+        expected = np.zeros(len(self.table), dtype=np.int64)
+        scanned = np.zeros(len(self.table), dtype=np.int64)
+        for label, count in progress.expected.items():
+            row = self._slot_rows.get(label)
+            if row is not None:
+                expected[row] += count
+                scanned[row] += progress.scanned.get(label, 0)
+        return expected, scanned
+
+    def filter(self, progress, query="", status="All"):
+        """Return the summary rows matching query and status, with progress."""
+        expected, scanned = self._progress_by_main(progress)
+        mask = np.ones(len(self.table), dtype=bool)
+        query = query.strip().lower()
+        if query:
+            mask &= self._search.str.contains(query, regex=False).to_numpy()
+        if status == "Not started":
+            mask &= (scanned == 0) & (expected > 0)
+        elif status == "In progress":
+            mask &= (scanned > 0) & (scanned < expected)
+        elif status == "Complete":
+            mask &= scanned >= expected
+
+        rows = self.table[mask].copy()
+        rows["Scanned"] = scanned[mask]
+        rows["Remaining"] = expected[mask] - scanned[mask]
+        return rows[SUMMARY_COLUMNS]
+
+    def page(self, progress, query="", status="All", page=1, page_size=PAGE_SIZE):
+        """Return (rows of one page, page number, page count, matching pallets).
+
+        page is clamped to the pages that exist, e.g. after a filter change.
+        """
+        rows = self.filter(progress, query, status)
+        pages = max(1, -(-len(rows) // page_size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        return rows.iloc[start:start + page_size], page, pages, len(rows)
+
+    def pallet(self, main_no, progress):
+        """Return one Main_No's slots with their scanned progress."""
+        rows = self.final_df.iloc[self._rows_by_main.get(main_no, [])]
+        labels = rows["Scan_Carton_No"].tolist()
+        expected = np.array([progress.expected.get(label, 0) for label in labels], dtype=np.int64)
+        scanned = np.array([progress.scanned.get(label, 0) for label in labels], dtype=np.int64)
+        detail = rows.assign(Scanned=scanned, Remaining=expected - scanned)
+        return detail[DETAIL_COLUMNS]
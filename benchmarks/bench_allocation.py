@@ -0,0 +1,69 @@
+"""Pallet capacity splitting: invariants and timing across all invoices.
+
+Allocates every carton of a synthetic packing list in one pass (by invoice),
+checks that no pallet exceeds its capacity, that unsplit slots keep their
+Scan_Carton_No and that the all-invoice pass agrees with the per-invoice
+allocation used by the Max page, then times each mode.
+
+Run from the repository root:
+
+    python benchmarks/bench_allocation.py [invoices] [cartons_per_invoice] [max_per_item]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Max.Max_Data_IN import allocate_cartons, allocate_invoice, allocate_pallets  # noqa: E402
+from tests.reference import check_allocation, make_cartons  # noqa: E402
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:32s} {time.perf_counter() - start:7.3f}s")
+    return result
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_invoice = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    max_per_item = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    df = make_cartons(invoices, per_invoice)
+    print(f"{len(df)} cartons on {invoices} invoices, max_per_item={max_per_item}")
+
+    base = timed("no capacity (numbering only)", lambda: allocate_pallets(df, by="INV"))
+    cartons, slots = timed("split by carton count", lambda: allocate_cartons(df, max_per_item, by="INV"))
+    check_allocation(cartons, slots, max_per_item)
+
+    # Slots that fit on one pallet keep the original Scan_Carton_No
+    single = slots[slots.groupby(["INV", "VPNs_combined", "ITEM"])["Pallet_No"].transform("max") == 1]
+    merged = single.merge(base, on=["INV", "VPNs_combined", "ITEM"], suffixes=("", "_base"))
+    assert (merged["Scan_Carton_No"] == merged["Scan_Carton_No_base"]).all()
+
+    weighted = timed(
+        "split by count and weight",
+        lambda: allocate_cartons(df, max_per_item, by="INV", weight="WEIGHT", max_weight=120.0),
+    )
+    check_allocation(*weighted, max_per_item, max_weight=120.0)
+    combined = timed(
+        "split and combine small slots",
+        lambda: allocate_cartons(df, max_per_item, by="INV", combine=True),
+    )
+    check_allocation(*combined, max_per_item)
+
+    # The all-invoice pass places every carton where the per-invoice one does
+    for inv in range(min(invoices, 5)):
+        rows = df[df["INV"] == inv].drop(columns=["INV", "VPNs_combined"])
+        per_invoice_cartons, _ = allocate_invoice(rows, max_per_item)
+        expected = cartons.loc[cartons["INV"] == inv, "Scan_Carton_No"].to_numpy()
+        assert (per_invoice_cartons["Scan_Carton_No"].to_numpy() == expected).all()
+
+    print(f"slots: {len(base)} -> {len(slots)} pallets by count, "
+          f"{combined[1]['Scan_Carton_No'].nunique()} labels after combining")
+    print("invariants hold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Export cost, size, open time and lookup latency of offline lookup bundles.
+
+Exports a bundle per invoice of a synthetic packing list, compares each
+bundle's size with the DataFrames and ScanIndex the app holds for the same
+invoice, then opens the bundles and times lookups in a fresh process, the
+way an offline station starts, and checks that pandas was never imported.
+
+Run from the repository root:
+
+    python benchmarks/bench_bundle.py [invoices] [cartons_per_invoice]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STATION = """
+import random, statistics, sys, time
+start = time.perf_counter()
+from Max.Max_Bundle import open_bundles
+bundles = open_bundles(sys.argv[1])
+opened = time.perf_counter() - start
+bundle = next(iter(bundles.values()))
+codes = [bundle._ids[bundle._id_offsets[i]:bundle._id_offsets[i + 1]].tobytes().decode() for i in range(len(bundle))]
+sample = random.Random(0).sample(codes, min(2000, len(codes))) + ["NOT-A-CONTAINER"] * 200
+seconds = []
+for code in sample:
+    t = time.perf_counter()
+    bundle.lookup(code)
+    seconds.append(time.perf_counter() - t)
+p = statistics.quantiles(seconds, n=100)
+print(f"open={opened * 1000:.1f} p50={p[49] * 1e6:.1f} p99={p[98] * 1e6:.1f} pandas={'pandas' in sys.modules}")
+"""
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cartons = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    from Max.Max_Bundle import export_bundles
+    from Max.Max_Data_IN import normalize_packing_list
+    from Max.Max_Snapshot import SnapshotStore
+    from packing_list import make_packing_list
+
+    data = normalize_packing_list(make_packing_list(invoices, cartons))
+    snapshot = SnapshotStore().get(lambda: (data, "bench"))
+    directory = tempfile.mkdtemp(prefix="max_bundles_")
+
+    start = time.perf_counter()
+    paths = export_bundles(snapshot, directory)
+    print(f"{invoices} invoices x {cartons} cartons: export {time.perf_counter() - start:.2f} s")
+
+    artifacts = snapshot.get_invoice(snapshot.c_inv_list[0])
+    frames = sum(int(df.memory_usage(deep=True).sum()) for df in (artifacts.filtered_df, artifacts.final_df))
+    print(f"  one invoice: bundle {os.path.getsize(paths[0]) / 2**10:.0f} KiB, "
+          f"filtered_df + final_df {frames / 2**10:.0f} KiB, "
+          f"ScanIndex {artifacts.scan_index.nbytes / 2**10:.0f} KiB")
+
+    out = subprocess.run(
+        [sys.executable, "-c", STATION, directory],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    result = dict(item.split("=") for item in out.split())
+    print(f"  station: {len(paths)} bundles opened in {result['open']} ms (including the import), "
+          f"lookup p50 {result['p50']} us  p99 {result['p99']} us, pandas imported: {result['pandas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Build time and query latency of the container ID candidate search.
+
+Builds ContainerSearch over one invoice's ScanIndex keys and over the whole
+snapshot's CartonIndex keys, then times damaged and partial scans drawn
+from real IDs: one character changed, dropped or added, two characters
+swapped, a prefix and a suffix.
+
+Run from the repository root:
+
+    python benchmarks/bench_container_search.py [invoices] [cartons_per_invoice]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Max.Max_Carton_Index import build_carton_index  # noqa: E402
+from Max.Max_Container_Search import ContainerSearch  # noqa: E402
+from Max.Max_Data_IN import normalize_packing_list  # noqa: E402
+from Max.Max_Snapshot import build_invoice  # noqa: E402
+from packing_list import make_packing_list  # noqa: E402
+
+
+def damage(code, kind, rng):
+    i = rng.randrange(len(code) - 1)
+    if kind == "changed":
+        return code[:i] + rng.choice("0123456789") + code[i + 1:]
+    if kind == "dropped":
+        return code[:i] + code[i + 1:]
+    if kind == "added":
+        return code[:i] + rng.choice("0123456789") + code[i:]
+    if kind == "swapped":
+        return code[:i] + code[i + 1] + code[i] + code[i + 2:]
+    if kind == "prefix":
+        return code[:len(code) // 2]
+    return code[-(len(code) // 2):]
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cartons = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    data = normalize_packing_list(make_packing_list(invoices, cartons))
+    keys = {
+        "invoice": build_invoice(data, data["C-INVC-NO"].iloc[0]).scan_index.keys,
+        "snapshot": build_carton_index(data).keys,
+    }
+    rng = random.Random(0)
+
+    for name, index_keys in keys.items():
+        start = time.perf_counter()
+        search = ContainerSearch(index_keys)
+        build = time.perf_counter() - start
+        print(f"{name}: {len(search)} IDs, build {build * 1000:.0f} ms, "
+              f"{search.nbytes / 2**20:.1f} MiB beyond the keys")
+        sample = rng.sample(index_keys.tolist(), 500)
+        for kind in ("changed", "dropped", "added", "swapped", "prefix", "suffix"):
+            seconds, hits = [], 0
+            for code in sample:
+                query = damage(code, kind, rng)
+                start = time.perf_counter()
+                found = search.search(query)
+                seconds.append(time.perf_counter() - start)
+                hits += code in dict(found) or code == query
+            p = statistics.quantiles(seconds, n=100)
+            print(f"  {kind:8s} p50 {p[49] * 1e6:6.0f} us  p99 {p[98] * 1e6:6.0f} us  "
+                  f"original offered {hits / len(sample):4.0%}")
+
+
+if __name__ == "__main__":
+    main()
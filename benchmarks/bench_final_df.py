@@ -0,0 +1,46 @@
+"""Equivalence check and timing for get_final_df / build_container_map.
+
+Run from the repository root:
+
+    python benchmarks/bench_final_df.py [rows]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Max.Max_Data_IN import build_container_map, get_final_df  # noqa: E402
+from tests.reference import make_invoice, reference_container_map, reference_final_df  # noqa: E402
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_invoice(rows)
+
+    # Without a capacity every slot stays on one pallet, as the baseline assumed
+    new_final, new_final_s = timed(lambda d: get_final_df(d, max_per_item=None), df)
+    old_final, old_final_s = timed(reference_final_df, df)
+    pd.testing.assert_frame_equal(new_final[old_final.columns], old_final)
+
+    new_map, new_map_s = timed(build_container_map, df)
+    old_map, old_map_s = timed(reference_container_map, df)
+    assert new_map == old_map
+    assert list(new_map) == list(old_map)
+
+    print(f"rows={rows}")
+    print(f"get_final_df        {old_final_s:8.3f}s -> {new_final_s:8.3f}s")
+    print(f"build_container_map {old_map_s:8.3f}s -> {new_map_s:8.3f}s")
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
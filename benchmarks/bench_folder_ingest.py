@@ -0,0 +1,81 @@
+"""Cold and warm load of a packing-list folder, serial and with parse workers.
+
+Writes several synthetic workbooks to a local SharePoint stub folder and
+times load_packing_list in folder mode: cold (download and parse every
+workbook) with 1 and with N parse workers, then warm (nothing changed) and
+after one file changed. Each run is a fresh process with its own cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_folder_ingest.py [--files 4] [--cartons 3000] [--workers 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FOLDER = "/sites/STNApplication/Shared Documents/Jeddah Fashion"
+
+
+def run_child(sharepoint_dir, touch):
+    """Time load_packing_list cold, warm and after touching one file; print the results."""
+    from Max.Max_Data_IN import load_packing_list
+
+    for label in ("cold", "warm", "one_changed"):
+        if label == "one_changed":
+            os.utime(os.path.join(sharepoint_dir, touch))
+        start = time.perf_counter()
+        df, version = load_packing_list()
+        print(f"{label}={time.perf_counter() - start:.3f}:{len(df)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--invoices", type=int, default=3, help="invoices per file")
+    parser.add_argument("--cartons", type=int, default=3000, help="cartons per invoice")
+    parser.add_argument("--workers", type=int, default=4, help="parse processes")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(os.environ["MAX_LOCAL_SHAREPOINT_DIR"], args.child)
+        return
+
+    from packing_list import make_packing_list
+
+    workdir = tempfile.mkdtemp(prefix="max_folder_")
+    sharepoint_dir = os.path.join(workdir, "sharepoint")
+    os.makedirs(sharepoint_dir)
+    for i in range(args.files):
+        df = make_packing_list(args.invoices, args.cartons, first_invoice=5000 + 100 * i, seed=i)
+        df.to_excel(os.path.join(sharepoint_dir, f"packing_list_{i}.xlsx"), index=False)
+
+    print(f"{args.files} workbooks x {args.invoices} invoices x {args.cartons} cartons, "
+          f"{os.cpu_count()} CPUs")
+    for workers in sorted({1, args.workers}):
+        env = dict(
+            os.environ,
+            MAX_LOCAL_SHAREPOINT_DIR=sharepoint_dir,
+            MAX_SHAREPOINT_FOLDER_PATH=FOLDER,
+            MAX_CACHE_DIR=tempfile.mkdtemp(dir=workdir),
+            MAX_METADATA_TTL_SECONDS="0",
+            MAX_PARSE_WORKERS=str(workers),
+        )
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "packing_list_0.xlsx"],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        timings = dict(line.split("=") for line in out.split() if "=" in line)
+        print(f"  {workers} parse worker(s): "
+              + "  ".join(f"{label} {float(value.split(':')[0]):6.2f} s" for label, value in timings.items())
+              + f"  ({timings['cold'].split(':')[1]} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Memory of the loaded packing list and peak memory of an invoice switch.
+
+Loads a synthetic packing list the way read_packing_list does, reports its
+in-memory size next to a plain object-string copy, then builds invoice
+artifacts (the work of an invoice switch) under tracemalloc and reports the
+peak allocation and time of each build.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py [invoices] [cartons_per_invoice]
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Max.Max_Data_IN import REQUIRED_COLUMNS, normalize_packing_list  # noqa: E402
+from Max.Max_Snapshot import build_invoice  # noqa: E402
+from packing_list import make_packing_list  # noqa: E402
+
+
+def mib(n):
+    return f"{n / 2**20:8.1f} MiB"
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cartons = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    raw = make_packing_list(invoices, cartons, messy=True)
+    raw.columns = raw.columns.str.strip()
+
+    plain = raw[REQUIRED_COLUMNS].copy()
+    for column in plain.columns[plain.dtypes == object]:
+        plain[column] = plain[column].astype(str).str.strip()
+    data = normalize_packing_list(raw.copy())
+
+    print(f"{len(data)} rows, {invoices} invoices")
+    print(f"object strings     {mib(plain.memory_usage(deep=True).sum())}")
+    print(f"loaded (normalized){mib(data.memory_usage(deep=True).sum())}")
+    for column in data.columns:
+        print(f"  {column:12s} {str(data[column].dtype):10s} {mib(data[column].memory_usage(deep=True))}")
+
+    c_invs = sorted(data["C-INVC-NO"].unique())[:5]
+    build_invoice(data, c_invs[0])  # warm imports and pandas caches
+    seconds = []
+    for c_inv in c_invs:
+        start = time.perf_counter()
+        build_invoice(data, c_inv)
+        seconds.append(time.perf_counter() - start)
+    peaks = []
+    for c_inv in c_invs:
+        tracemalloc.start()
+        build_invoice(data, c_inv)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"invoice switch: peak {mib(statistics.median(peaks))}, "
+          f"{statistics.median(seconds) * 1000:.0f} ms (median of {len(c_invs)})")
+
+
+if __name__ == "__main__":
+    main()
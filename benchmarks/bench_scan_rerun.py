@@ -0,0 +1,56 @@
+"""Per-scan rerun time of the Max page: full script vs the scan panel fragment.
+
+Serves a synthetic packing list through the local SharePoint stub and
+drives streamlit_app with AppTest. Each scan reports the wall time of a
+full script rerun (what every scan used to cost) and the time spent in
+the scan panel fragment (what a scan reruns now).
+
+Run from the repository root:
+
+    python benchmarks/bench_scan_rerun.py [invoices] [cartons_per_invoice] [scans]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="max_bench_")
+os.environ["MAX_LOCAL_SHAREPOINT_DIR"] = WORKDIR
+os.environ["MAX_CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+os.environ["MAX_LEDGER_PATH"] = os.path.join(WORKDIR, "scan_ledger.sqlite3")
+os.environ["MAX_REFRESH_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, ROOT)
+
+from packing_list import make_packing_list, write_packing_list  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    cartons = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    scans = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    df = make_packing_list(invoices, cartons)
+    write_packing_list(WORKDIR, df)
+    codes = df.loc[df["C-INVC-NO"] == 5000, "CONTAINER_ID"].drop_duplicates().sample(scans, random_state=1)
+
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=600)
+    at.run()
+    at.button(key="max_btn").click().run()
+
+    full_ms, panel_ms = [], []
+    for code in codes:
+        start = time.perf_counter()
+        at.text_input(key="scan_text").input(code).run()
+        full_ms.append((time.perf_counter() - start) * 1000)
+        panel_ms.append(at.session_state.render_ms["scan panel"])
+    assert not at.exception, [e.value for e in at.exception]
+
+    print(f"{invoices} invoices x {cartons} cartons, {scans} scans")
+    for name, values in (("full script rerun", full_ms), ("scan panel fragment", panel_ms)):
+        print(f"{name:20s} median {statistics.median(values):7.1f} ms  max {max(values):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
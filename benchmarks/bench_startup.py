@@ -0,0 +1,109 @@
+"""Import time and time-to-first-scan of the Streamlit app, with and without prefetch.
+
+Import times are measured in fresh interpreters. Time to first scan drives
+streamlit_app.py with AppTest against a local SharePoint stub: the landing
+page renders, the operator takes --think seconds to click MAX, and the first
+carton of the default invoice is scanned. Each mode runs in its own process
+so nothing is cached between them.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--invoices 10] [--cartons 2000] [--think 5.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORTS = {
+    "streamlit_app": "import streamlit_app",
+    "Max.Max (after streamlit)": "import streamlit; start = time.perf_counter(); import Max.Max",
+}
+
+
+def import_seconds(statement, repeat=3):
+    """Median wall time of statement in fresh interpreters."""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    runs = [
+        float(subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.split()[-1])
+        for _ in range(repeat)
+    ]
+    return statistics.median(runs)
+
+
+def first_scan(think, code):
+    """Drive the app from landing page to first scan; print timings as JSON."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    landing = time.perf_counter() - start
+    time.sleep(think)
+
+    clicked = time.perf_counter()
+    at.button(key="max_btn").click().run()
+    at.text_input(key="scan_text").input(code).run()
+    done = time.perf_counter()
+    if at.exception:
+        raise RuntimeError([e.value for e in at.exception])
+    print(json.dumps({
+        "landing": landing,
+        "click to scan": done - clicked,
+        "first scan": done - start,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=10)
+    parser.add_argument("--cartons", type=int, default=2000)
+    parser.add_argument("--think", type=float, default=5.0,
+                        help="seconds between the landing page and the MAX click")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_scan(args.think, args.child)
+        return
+
+    from packing_list import make_packing_list, write_packing_list
+
+    for name, statement in IMPORTS.items():
+        print(f"import {name:28s} {import_seconds(statement) * 1000:7.0f} ms")
+
+    workdir = tempfile.mkdtemp(prefix="max_startup_")
+    df = make_packing_list(args.invoices, args.cartons)
+    write_packing_list(workdir, df)
+    code = df.loc[df["C-INVC-NO"] == df["C-INVC-NO"].min(), "CONTAINER_ID"].iloc[0]
+
+    print(f"time to first scan, {args.invoices} invoices x {args.cartons} cartons, "
+          f"{args.think:.1f} s before the click:")
+    for prefetch in ("0", "1"):
+        env = dict(
+            os.environ,
+            MAX_PREFETCH=prefetch,
+            MAX_LOCAL_SHAREPOINT_DIR=workdir,
+            MAX_CACHE_DIR=tempfile.mkdtemp(dir=workdir),
+            MAX_LEDGER_PATH=os.path.join(tempfile.mkdtemp(dir=workdir), "scan_ledger.sqlite3"),
+            MAX_REFRESH_INTERVAL_SECONDS="0",
+        )
+        out = subprocess.run(
+            [sys.executable, __file__, "--think", str(args.think), "--child", code],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        timings = json.loads(out.strip().splitlines()[-1])
+        print(f"  prefetch {'on ' if prefetch == '1' else 'off'}: "
+              + "  ".join(f"{name} {seconds * 1000:7.0f} ms" for name, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Multi-session load test of the Streamlit app with a local SharePoint stub.
+
+Each simulated scanner session is an AppTest of streamlit_app.py: it opens
+the Max page, picks an invoice and fires a scan sequence. All sessions live
+in one process, so they share the snapshot, artifact cache, ledger and scan
+engine exactly as browser sessions on one app server do.
+
+Two phases:
+  1. Sessions are opened one by one under tracemalloc; the memory each one
+     retains is its per-session cost.
+  2. Sessions take turns scanning, round-robin, and halfway through each
+     switches invoice; the run reports throughput and percentiles for scan
+     reruns and invoice switches.
+
+AppTest keeps global runtime state and cannot run sessions from several
+threads, so reruns are serialized, as on a single-threaded server core.
+
+Run from the repository root:
+
+    python benchmarks/load_sessions.py [--sessions 8] [--scans 40] [--invoices 10] [--cartons 5000]
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="max_sessions_")
+os.environ["MAX_LOCAL_SHAREPOINT_DIR"] = WORKDIR
+os.environ["MAX_CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+os.environ["MAX_LEDGER_PATH"] = os.path.join(WORKDIR, "scan_ledger.sqlite3")
+os.environ["MAX_REFRESH_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from packing_list import make_packing_list, write_packing_list  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def open_session(station, c_inv):
+    """Return an AppTest session on the Max page with c_inv selected."""
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=600)
+    at.query_params["station"] = station
+    at.run()
+    at.button(key="max_btn").click().run()
+    at.selectbox(key="c_inv_select").set_value(c_inv).run()
+    check(at)
+    return at
+
+
+def check(at):
+    if at.exception:
+        raise RuntimeError([e.value for e in at.exception])
+
+
+def timed_run(at, timings, name):
+    start = time.perf_counter()
+    at.run()
+    timings[name].append(time.perf_counter() - start)
+    check(at)
+
+
+def percentiles(values):
+    p = statistics.quantiles(values, n=100) if len(values) > 1 else [values[0]] * 99
+    return f"p50 {p[49] * 1000:8.1f} ms  p95 {p[94] * 1000:8.1f} ms  p99 {p[98] * 1000:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--scans", type=int, default=40, help="scans per session")
+    parser.add_argument("--invoices", type=int, default=10)
+    parser.add_argument("--cartons", type=int, default=5000)
+    args = parser.parse_args()
+
+    df = make_packing_list(args.invoices, args.cartons)
+    write_packing_list(WORKDIR, df)
+    c_invs = sorted(df["C-INVC-NO"].unique())
+    rng = np.random.default_rng(0)
+
+    # Warm the shared snapshot and invoice artifacts so phase 1 measures
+    # what each session adds, not data every session shares
+    warmup = open_session("warmup", c_invs[0])
+    for c_inv in c_invs[1:]:
+        warmup.selectbox(key="c_inv_select").set_value(c_inv).run()
+    check(warmup)
+
+    tracemalloc.start()
+    sessions, retained = [], []
+    for i in range(args.sessions):
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        sessions.append(open_session(f"load-{i}", c_invs[i % len(c_invs)]))
+        gc.collect()
+        retained.append(tracemalloc.get_traced_memory()[0] - before)
+    tracemalloc.stop()
+
+    plans = []
+    for i in range(len(sessions)):
+        c_inv = c_invs[i % len(c_invs)]
+        own = df.loc[df["C-INVC-NO"] == c_inv, "CONTAINER_ID"].to_numpy()
+        plans.append((rng.choice(own, args.scans).tolist(), c_invs[(i + 1) % len(c_invs)]))
+
+    timings = {"scan": [], "invoice switch": []}
+    start = time.perf_counter()
+    for step in range(args.scans):
+        for at, (codes, switch_to) in zip(sessions, plans):
+            at.text_input(key="scan_text").input(codes[step])
+            timed_run(at, timings, "scan")
+            if step == args.scans // 2:
+                at.selectbox(key="c_inv_select").set_value(switch_to)
+                timed_run(at, timings, "invoice switch")
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions x {args.scans} scans, "
+          f"{args.invoices} invoices x {args.cartons} cartons")
+    print(f"memory retained per session: median {statistics.median(retained) / 1024:.0f} KiB, "
+          f"max {max(retained) / 1024:.0f} KiB (tracemalloc)")
+    scans = len(timings["scan"])
+    print(f"throughput: {scans} scan reruns in {elapsed:.2f} s = {scans / elapsed:.1f} scans/sec "
+          f"(invoice switches included in the time)")
+    for name, values in timings.items():
+        if values:
+            print(f"{name:15s} {percentiles(values)}  (n={len(values)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Deterministic synthetic supplier_packing_list_out.xlsx data.
+
+Shared by the benchmark scripts. One row per carton and item, like the
+SharePoint workbook: a plain carton holds one item; a mixed carton holds
+several items of one style, differing in size (DIFF_2) or, for styles
+without sizes, in color (DIFF_1). Style popularity is skewed, so a few
+VPN:color groups are large and most are small.
+
+    from packing_list import make_packing_list, write_packing_list
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+COLORS = np.array(["BLACK", "WHITE", "NAVY", "RED", "GREY", "OLIVE"], dtype=object)
+SIZES = np.array(["XS", "S", "M", "L", "XL", "XXL"], dtype=object)
+FILE_NAME = "supplier_packing_list_out.xlsx"
+
+
+def make_packing_list(invoices=3, cartons=1000, items_per_carton=3, mixed_ratio=0.05,
+                      diff2_ratio=0.3, first_invoice=5000, seed=0, messy=False):
+    """Return a packing-list DataFrame with `cartons` containers per invoice.
+
+    items_per_carton is the largest number of items in a mixed carton,
+    mixed_ratio the share of mixed cartons and diff2_ratio the share of
+    styles that use DIFF_2 sizes. With messy, IDs and styles get stray
+    whitespace and some colors are missing, as in real supplier files.
+    """
+    rng = np.random.default_rng(seed)
+    total = invoices * cartons
+    n_styles = max(total // 200, 5)
+
+    style = (rng.pareto(1.2, total) * n_styles / 20).astype(np.int64) % n_styles
+    color = (style + rng.integers(0, 3, total)) % len(COLORS)
+    size = rng.integers(0, len(SIZES), total)
+    mixed = rng.random(total) < mixed_ratio
+    n_rows = np.where(mixed, rng.integers(2, max(items_per_carton, 2) + 1, total), 1)
+
+    # Expand cartons into rows; the k-th row of a mixed carton varies size or color
+    carton = np.repeat(np.arange(total), n_rows)
+    k = np.arange(len(carton)) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    style, color, size = style[carton], color[carton], size[carton]
+    uses_diff2 = (style * 2654435761 % 1000) < diff2_ratio * 1000
+    size = np.where(uses_diff2, (size + k) % len(SIZES), -1)
+    color = np.where(uses_diff2, color, (color + k) % len(COLORS))
+
+    item = 1_000_000 + style * 100 + color * 10 + np.maximum(size, 0)
+    diff_2 = np.where(size >= 0, SIZES[np.maximum(size, 0)], "")
+    df = pd.DataFrame({
+        "C-INVC-NO": first_invoice + carton // cartons,
+        "CONTAINER_ID": [f"C{i:09d}" for i in carton],
+        "ITEM": item,
+        "VPN": [f"VPN{i:05d}" for i in style],
+        "DIFF_1": COLORS[color],
+        "DIFF_2": diff_2.astype(object),
+        "PRICE": (style % 40) * 5 + 9.95,
+    })
+
+    if messy:
+        pad = rng.random(len(df)) < 0.1
+        df.loc[pad, "CONTAINER_ID"] = " " + df.loc[pad, "CONTAINER_ID"] + " "
+        df.loc[pad, "VPN"] = df.loc[pad, "VPN"] + " "
+        df.loc[rng.random(len(df)) < 0.02, "DIFF_1"] = None
+        df = df.rename(columns={"CONTAINER_ID": " CONTAINER_ID"})
+    return df
+
+
+def write_packing_list(directory, df):
+    """Write df as the workbook a local SharePoint folder serves; return its path."""
+    path = os.path.join(directory, FILE_NAME)
+    df.to_excel(path, index=False)
+    return path
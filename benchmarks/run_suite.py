@@ -0,0 +1,175 @@
+"""Benchmark suite for the Max pipeline, with results written as JSON.
+
+This script is the timing suite; correctness is tested by the pytest suite
+in tests/, which the timings are not part of. Timings are kept out of
+pytest because they are compared across runs and machines through the JSON
+results (--compare), not asserted against thresholds.
+
+For each size, a synthetic packing list is served through the local
+SharePoint stub and the suite times load_data (cold and warm), the
+per-invoice steps of an invoice switch (get_filtered_data, get_final_df,
+build_container_map, the full build_invoice) and a single scan through the
+scan engine behind process_scan.
+
+With --check, the pytest suite (on the same packing_list generator) runs
+first and a failure stops the timing.
+
+Run from the repository root:
+
+    python benchmarks/run_suite.py [--sizes small,medium] [--output results.json]
+                                   [--compare earlier.json] [--check]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="max_suite_")
+os.environ["MAX_LOCAL_SHAREPOINT_DIR"] = WORKDIR
+os.environ["MAX_CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+os.environ["MAX_METADATA_TTL_SECONDS"] = "0"
+os.environ["MAX_REFRESH_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from Max.Max_Data_IN import (  # noqa: E402
+    build_container_map, get_filtered_data, get_final_df, load_data,
+)
+from Max.Max_Scan_Engine import ScanEngine  # noqa: E402
+from Max.Max_Snapshot import SnapshotStore, build_invoice  # noqa: E402
+from packing_list import make_packing_list, write_packing_list  # noqa: E402
+
+# name: (invoices, cartons per invoice)
+SIZES = {
+    "small": (2, 1_000),
+    "medium": (10, 5_000),
+    "large": (40, 10_000),
+}
+
+
+def measure(func, repeats):
+    """Return (result, [seconds per call]) over `repeats` calls."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def record(results, size, benchmark, times, **extra):
+    results.append({
+        "size": size,
+        "benchmark": benchmark,
+        "repeats": len(times),
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        **extra,
+    })
+    print(f"{size:8s} {benchmark:32s} median {statistics.median(times) * 1000:10.3f} ms")
+
+
+def run_size(name, invoices, cartons, results):
+    df = make_packing_list(invoices, cartons, messy=True)
+    write_packing_list(WORKDIR, df)
+    shape = {"invoices": invoices, "cartons": cartons, "rows": len(df)}
+
+    # Cold: new file version, so download, parse and Parquet conversion
+    data, times = measure(load_data, 1)
+    record(results, name, "load_data (cold)", times, **shape)
+    _, times = measure(load_data, 3)
+    record(results, name, "load_data (warm)", times, **shape)
+
+    c_invs = sorted(data["C-INVC-NO"].unique())[:5]
+    filtered = [get_filtered_data(c_inv, data) for c_inv in c_invs]
+    times = [measure(lambda c=c_inv: get_filtered_data(c, data), 1)[1][0] for c_inv in c_invs]
+    record(results, name, "get_filtered_data", times, **shape)
+    times = [measure(lambda f=f: get_final_df(f), 1)[1][0] for f in filtered]
+    record(results, name, "get_final_df", times, **shape)
+    times = [measure(lambda f=f: build_container_map(f), 1)[1][0] for f in filtered]
+    record(results, name, "build_container_map", times, **shape)
+    times = [measure(lambda c=c_inv: build_invoice(data, c), 1)[1][0] for c_inv in c_invs]
+    record(results, name, "invoice switch (build_invoice)", times, **shape)
+
+    # Scans mix hits on the selected invoice, other invoices and unknown codes
+    store = SnapshotStore()
+    snapshot = store.swap(data, name)
+    engine = ScanEngine(store)
+    c_inv = c_invs[0]
+    engine.progress(snapshot, c_inv)
+    codes = data["CONTAINER_ID"].sample(2000, replace=True, random_state=0).tolist()
+    codes[::10] = ["UNKNOWN"] * len(codes[::10])
+    times = [measure(lambda c=code: engine.scan("bench", c_inv, c, snapshot=snapshot), 1)[1][0]
+             for code in codes]
+    record(results, name, "process_scan (engine)", times, **shape)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, path):
+    """Print each benchmark's median against an earlier results file."""
+    with open(path, encoding="utf-8") as f:
+        earlier = {(r["size"], r["benchmark"]): r for r in json.load(f)["results"]}
+    print(f"\ncompared with {path}")
+    for r in results:
+        before = earlier.get((r["size"], r["benchmark"]))
+        if before:
+            ratio = r["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+            print(f"{r['size']:8s} {r['benchmark']:32s} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated, of {', '.join(SIZES)}")
+    parser.add_argument("--output", default=None, help="JSON path (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to compare against")
+    parser.add_argument("--check", action="store_true", help="run the tests first; stop if they fail")
+    args = parser.parse_args()
+
+    if args.check:
+        import pytest
+
+        code = pytest.main(["-q", os.path.join(ROOT, "tests")])
+        if code:
+            sys.exit(code)
+
+    results = []
+    for name in args.sizes.split(","):
+        run_size(name, *SIZES[name], results)
+
+    started = datetime.now()
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"suite-{started:%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": started.isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nwrote {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Load generator for the local scan endpoint.
+
+Starts a ScanEngine and its asyncio HTTP endpoint on a synthetic packing
+list, then simulates many scanner stations from worker processes. Every
+station keeps one connection open and sends its scans back to back, the way
+a handheld scanner would; the run reports scans/sec and latency percentiles.
+
+Run from the repository root:
+
+    python benchmarks/scan_load.py [--stations 64] [--scans 500] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Max.Max_Data_IN import normalize_packing_list  # noqa: E402
+from Max.Max_Scan_Engine import ScanEngine, ScanServer  # noqa: E402
+from Max.Max_Scan_Ledger import ScanLedger  # noqa: E402
+from Max.Max_Snapshot import SnapshotStore  # noqa: E402
+from packing_list import make_packing_list  # noqa: E402
+
+
+async def run_station(port, station, c_inv, codes, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for code in codes:
+        body = json.dumps({"station": station, "c_inv": c_inv, "code": code}).encode()
+        start = time.perf_counter()
+        writer.write(
+            b"POST /scan HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+        )
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+def run_worker(args):
+    """Run a group of stations in one process; return their latencies."""
+    port, stations = args
+    latencies = []
+
+    async def run_all():
+        await asyncio.gather(*(
+            run_station(port, station, c_inv, codes, latencies)
+            for station, c_inv, codes in stations
+        ))
+
+    asyncio.run(run_all())
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=20)
+    parser.add_argument("--cartons", type=int, default=5000)
+    parser.add_argument("--stations", type=int, default=64)
+    parser.add_argument("--scans", type=int, default=500, help="scans per station")
+    parser.add_argument("--workers", type=int, default=4, help="client processes")
+    args = parser.parse_args()
+
+    data = make_packing_list(args.invoices, args.cartons)
+    store = SnapshotStore()
+    snapshot = store.swap(normalize_packing_list(data), "bench")
+    ledger = ScanLedger(os.path.join(tempfile.mkdtemp(prefix="max_load_"), "scan_ledger.sqlite3"))
+    engine = ScanEngine(store, ledger)
+    for c_inv in snapshot.c_inv_list:
+        engine.progress(snapshot, c_inv)
+    server = ScanServer(engine, "127.0.0.1", 0).start()
+
+    # Stations share invoices, so per-invoice progress is contended; a few
+    # percent of scans are wrong-invoice or unknown codes
+    rng = np.random.default_rng(1)
+    ids = data["CONTAINER_ID"].to_numpy()
+    stations = []
+    for i in range(args.stations):
+        c_inv = int(snapshot.c_inv_list[i % len(snapshot.c_inv_list)])
+        own = ids[data["C-INVC-NO"].to_numpy() == c_inv]
+        codes = rng.choice(own, args.scans).tolist()
+        for j in rng.choice(args.scans, args.scans // 20, replace=False):
+            codes[j] = rng.choice(ids) if j % 2 else f"X{j:09d}"
+        stations.append((f"load-{i}", c_inv, codes))
+    groups = [(server.port, stations[w::args.workers]) for w in range(args.workers)]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        latencies = [value for part in pool.map(run_worker, groups) for value in part]
+    elapsed = time.perf_counter() - start
+    ledger.flush()
+
+    total = len(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    scanned = sum(engine.progress(snapshot, c_inv).total_scanned for c_inv in snapshot.c_inv_list)
+    print(f"{args.stations} stations x {args.scans} scans on {args.invoices} invoices "
+          f"({args.workers} client processes)")
+    print(f"{total} scans in {elapsed:.2f} s: {total / elapsed:,.0f} scans/sec")
+    print(f"latency p50 {quantiles[49] * 1000:.2f} ms  p95 {quantiles[94] * 1000:.2f} ms  "
+          f"p99 {quantiles[98] * 1000:.2f} ms")
+    print(f"distinct cartons counted across stations: {scanned}")
+    server.stop()
+    ledger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
 import streamlit as st
+import logging
+import os
+import threading
+import time
+
+# Start importing the Max page and loading its packing list while the
+# landing page is shown (MAX_PREFETCH=0 disables)
+PREFETCH_ENABLED = os.environ.get("MAX_PREFETCH", "1") == "1"
 
 # Lazy imports - only load when needed
 def get_max_module():
     try:
+        start = time.perf_counter()
         from Max.Max import run_max_page
+        if "max_import_seconds" not in st.session_state:
+            # What this session waited for the import; near zero once prefetched
+            st.session_state.max_import_seconds = time.perf_counter() - start
+            from Max.Max_Metrics import record_since
+            record_since("import Max", start)
         return run_max_page
     except ImportError as e:
         st.error(f"Max module import error: {str(e)}")
@@ -88,16 +102,38 @@ def get_landing_styles():
         </style>
         """
 
+def prefetch_max():
+    """Import the Max page and warm its shared data (background thread)."""
+    start = time.perf_counter()
+    try:
+        from Max.Max import prefetch_max_data
+    except Exception:
+        logging.getLogger(__name__).exception("Max module prefetch failed")
+        return
+    from Max.Max_Metrics import record_since
+    record_since("prefetch import", start)
+    prefetch_max_data()
+
+@st.cache_resource
+def start_max_prefetch():
+    """Start the Max prefetch once per server process."""
+    thread = threading.Thread(target=prefetch_max, name="max-prefetch", daemon=True)
+    thread.start()
+    return thread
+
 def init_session_state():
     defaults = {
         "show_landing": True,
-        "company_selected": None
+        "company_selected": None,
+        "session_started": time.perf_counter()
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
 def render_landing_page():
+    if PREFETCH_ENABLED:
+        start_max_prefetch()
     st.markdown(get_landing_styles(), unsafe_allow_html=True)
     st.markdown('<div class="centered-container">', unsafe_allow_html=True)
     st.markdown('<h1 class="main-title">📦 Carton Segregator</h1>', unsafe_allow_html=True)
@@ -0,0 +1,32 @@
+import pytest
+
+from Max.Max_Cache import ArtifactCache
+from Max.Max_Data_IN import normalize_packing_list
+from Max.Max_Scan_Ledger import ScanLedger
+from Max.Max_Snapshot import SnapshotStore
+from benchmarks.packing_list import make_packing_list
+
+
+@pytest.fixture(scope="session")
+def packing_list():
+    """A normalized three-invoice packing list with messy source values."""
+    return normalize_packing_list(make_packing_list(3, 400, messy=True))
+
+
+@pytest.fixture
+def store(packing_list):
+    store = SnapshotStore(ArtifactCache(2**30))
+    store.get(lambda: (packing_list, "v1"))
+    return store
+
+
+@pytest.fixture
+def snapshot(store):
+    return store.current
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ScanLedger(str(tmp_path / "scan_ledger.sqlite3"))
+    yield ledger
+    ledger.close()
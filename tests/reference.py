@@ -0,0 +1,105 @@
+"""Reference implementations and synthetic inputs shared by tests and benchmarks.
+
+The reference functions are the original row-by-row get_final_df and
+build_container_map; the vectorized versions must match them exactly.
+"""
+import numpy as np
+import pandas as pd
+
+
+def reference_container_map(df):
+    """Row-by-row build_container_map kept as the equivalence baseline."""
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    df['DIFF_1'] = df.get('DIFF_1', 'UNKNOWN').fillna('UNKNOWN').astype(str).str.strip()
+    df['DIFF_2'] = df.get('DIFF_2', '').fillna('').astype(str).str.strip()
+
+    container_map = {}
+    for _, row in df.iterrows():
+        container_id = str(row['CONTAINER_ID']).strip()
+        vpn = str(row['VPN']).strip()
+        diff1 = row['DIFF_1']
+        diff2 = row['DIFF_2']
+        container_map[container_id] = (vpn, diff1)
+        container_map[f"{container_id}_alt"] = (vpn, diff2 + diff1 if diff2 else diff1)
+    return container_map
+
+
+def reference_final_df(df):
+    """Row-wise get_final_df kept as the equivalence baseline."""
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    df['CONTAINER_ID'] = df['CONTAINER_ID'].astype(str).str.strip()
+    df['ITEM'] = df['ITEM'].astype(str).str.strip()
+    df['VPN'] = df['VPN'].astype(str).str.strip()
+    df['DIFF_1'] = df.get('DIFF_1', '').fillna('UNKNOWN').astype(str).str.strip()
+    df['DIFF_2'] = df.get('DIFF_2', '').fillna('').astype(str).str.strip()
+
+    df['VPNs_combined'] = df.apply(lambda r: f"{r['VPN']}:{r['DIFF_1']}", axis=1)
+
+    results = []
+    main_counter = 1
+
+    for group_key, group_df in df.groupby('VPNs_combined'):
+        main_num = main_counter
+        main_counter += 1
+
+        item_list = group_df['ITEM'].unique()
+        for sub_idx, item_code in enumerate(item_list, start=1):
+            results.append({
+                'Main_No': main_num,
+                'Sub_No': sub_idx,
+                'Item': item_code,
+                'VPNs_combined': group_key
+            })
+
+    final_df = pd.DataFrame(results)
+    final_df['Scan_Carton_No'] = final_df.apply(
+        lambda r: f"{r['Main_No']}.{r['Sub_No']}", axis=1
+    )
+    final_df = final_df.sort_values(by=['Main_No', 'Sub_No']).reset_index(drop=True)
+
+    return final_df[['Scan_Carton_No', 'Main_No', 'Sub_No', 'VPNs_combined', 'Item']]
+
+
+def make_invoice(rows, seed=0):
+    """Return a packing-list-shaped invoice with messy whitespace and NaNs."""
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, max(rows // 20, 1), rows)
+    colors = np.array([" RED", "BLUE ", None, "GREEN"], dtype=object)
+    sizes = np.array(["", None, "S", " M"], dtype=object)
+    return pd.DataFrame({
+        " CONTAINER_ID": [f" C{i // 2:08d} " for i in range(rows)],
+        "ITEM": [f"{100000 + i} " for i in items],
+        "VPN": [f" V{i % 97}" for i in items],
+        "DIFF_1": colors[items % 4],
+        "DIFF_2": sizes[rng.integers(0, 4, rows)],
+        "PRICE": items.astype(float),
+    })
+
+
+def make_cartons(invoices, cartons, seed=0):
+    """Return cleaned allocation input: one row per carton, skewed style sizes."""
+    rng = np.random.default_rng(seed)
+    rows = invoices * cartons
+    # A few large styles and a long tail of small ones
+    items = (rng.pareto(1.2, rows) * 3).astype(np.int64) % max(cartons // 5, 1)
+    df = pd.DataFrame({
+        "INV": np.repeat(np.arange(invoices), cartons),
+        "CONTAINER_ID": [f"C{i:09d}" for i in range(rows)],
+        "ITEM": (100000 + items).astype(str),
+        "VPN": [f"V{i % 71}" for i in items],
+        "DIFF_1": np.array(["RED", "BLUE", "GREEN"], dtype=object)[items % 3],
+        "WEIGHT": rng.uniform(2.0, 25.0, rows).round(1),
+    })
+    df["VPNs_combined"] = df["VPN"] + ":" + df["DIFF_1"]
+    return df
+
+
+def check_allocation(cartons, slots, max_per_item, max_weight=None):
+    """Assert every carton is placed and no pallet is over capacity."""
+    assert slots["Cartons"].sum() == len(cartons)
+    per_pallet = cartons.groupby(["INV", "Scan_Carton_No"]).size()
+    assert per_pallet.max() <= max_per_item, per_pallet.max()
+    if max_weight is not None:
+        assert (slots.loc[slots["Cartons"] > 1, "Weight"] <= max_weight).all()
@@ -0,0 +1,38 @@
+import pytest
+
+from Max.Max_Batch_Scan import read_codes, resolve_batch, summarize_batch
+
+
+def test_reads_pasted_lines_and_plain_csv():
+    assert read_codes("C1\nC2,10:00\n", b"C3\nC4,10:01\n") == ["C1", "C2", "C3", "C4"]
+
+
+def test_reads_ragged_rows_and_skips_blank_lines():
+    assert read_codes(csv_bytes=b"C1\n\nC2,10:00,extra\nC3\n") == ["C1", "C2", "C3"]
+
+
+def test_reads_the_container_id_column_after_a_header():
+    data = "\ufeffscanned_at, container_id \n10:00,C1\n10:01\n10:02,C2\n".encode("utf-8")
+    assert read_codes(csv_bytes=data) == ["C1", "C2"]
+
+
+@pytest.mark.parametrize("data", [b"", b"\n", b"\r\n\r\n"])
+def test_blank_upload_has_no_codes(data):
+    assert read_codes("C1", data) == ["C1"]
+
+
+def test_rejects_a_binary_upload():
+    with pytest.raises(ValueError, match="not a readable CSV"):
+        read_codes(csv_bytes=b"\xff\xfe\x00binary")
+
+
+def test_resolve_batch_statuses(snapshot):
+    first, second = snapshot.c_inv_list[:2]
+    scan_index = snapshot.get_invoice(first).scan_index
+    own, other = scan_index.keys[0], snapshot.get_invoice(second).scan_index.keys[0]
+
+    result = resolve_batch([own, f" {own.lower()} ", other, "ZZZ", ""], first, scan_index, snapshot.carton_index)
+    assert result["Status"].tolist() == ["OK", "OK", "WRONG C-INV", "MISMATCH"]
+    assert result["Duplicate"].tolist() == [False, True, False, False]
+    assert result["C-INV"].tolist()[2] == second
+    assert summarize_batch(result)["DUPLICATE"] == 1
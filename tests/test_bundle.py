@@ -0,0 +1,52 @@
+import pytest
+
+from Max.Max_Bundle import LookupBundle, export_bundles, open_bundles, resolve, write_bundle
+
+
+@pytest.fixture
+def bundles(snapshot, tmp_path):
+    export_bundles(snapshot, str(tmp_path))
+    bundles = open_bundles(str(tmp_path))
+    yield bundles
+    for bundle in bundles.values():
+        bundle.close()
+
+
+def test_lookup_matches_scan_index(snapshot, tmp_path):
+    c_inv = snapshot.c_inv_list[0]
+    scan_index = snapshot.get_invoice(c_inv).scan_index
+    path = write_bundle(str(tmp_path / "one.maxb"), c_inv, scan_index, snapshot.version)
+
+    with LookupBundle(path) as bundle:
+        assert len(bundle) == len(scan_index)
+        assert bundle.c_inv == c_inv
+        assert bundle.version == snapshot.version
+        for code in scan_index.keys:
+            assert tuple(bundle.lookup(code)) == tuple(scan_index.lookup(code))
+        # Scans are normalized the way the scan index normalizes them
+        code = scan_index.keys[0]
+        assert bundle.lookup(f"  {code.lower()} ") == bundle.lookup(code)
+        assert bundle.lookup("NOT-A-CONTAINER") is None
+        assert "NOT-A-CONTAINER" not in bundle
+
+
+def test_open_keys_bundles_by_c_inv_text(snapshot, bundles):
+    assert sorted(bundles) == sorted(str(c_inv) for c_inv in snapshot.c_inv_list)
+
+
+def test_resolve_statuses_match_the_engine(snapshot, bundles):
+    first, second = (str(c_inv) for c_inv in snapshot.c_inv_list[:2])
+    code = snapshot.get_invoice(snapshot.c_inv_list[0]).scan_index.keys[0]
+    pallet, status, status_type = resolve(bundles, first, code)
+    assert status == f"Pallet - {pallet}"
+    assert status_type == "success"
+    assert resolve(bundles, second, code) == (None, f"WRONG C-INV: {code} is in {first}", "warning")
+    assert resolve(bundles, first, "zzz") == (None, "MISMATCH: ZZZ not found", "danger")
+    assert resolve(bundles, first, "  ") == (None, "EMPTY SCAN", "danger")
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_bundle.maxb"
+    path.write_bytes(b"PK\x03\x04 not a bundle")
+    with pytest.raises(ValueError, match="not a lookup bundle"):
+        LookupBundle(str(path))
@@ -0,0 +1,67 @@
+import threading
+
+from Max.Max_Cache import ArtifactCache
+
+
+def make_cache(max_bytes):
+    # Every value counts as its own length, so sizes are easy to reason about
+    return ArtifactCache(max_bytes, size_of=len)
+
+
+def test_evicts_least_recently_used():
+    cache = make_cache(10)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+    assert cache.current_bytes == 8
+
+
+def test_keeps_newest_entry_over_budget():
+    cache = make_cache(4)
+    cache.put("a", "xx")
+    cache.put("big", "xxxxxxxx")
+    assert list(cache._entries) == ["big"]
+    assert cache.evictions == 1
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = make_cache(100)
+    cache.put("a", "xxxx")
+    cache.put("a", "xx")
+    assert len(cache) == 1
+    assert cache.current_bytes == 2
+
+
+def test_hit_and_miss_counters():
+    cache = make_cache(100)
+    builds = []
+    for _ in range(3):
+        cache.get_or_build("a", lambda: builds.append(1) or "value")
+    assert builds == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["bytes"] == len("value")
+
+
+def test_concurrent_callers_build_once():
+    cache = make_cache(100)
+    started = threading.Event()
+    builds = []
+
+    def build():
+        builds.append(1)
+        started.wait(1)
+        return "value"
+
+    threads = [threading.Thread(target=cache.get_or_build, args=("a", build)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
+    assert cache.misses == 1
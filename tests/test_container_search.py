@@ -0,0 +1,35 @@
+import pandas as pd
+
+from Max.Max_Container_Search import ContainerSearch
+
+KEYS = ["C000123456", "C000123457", "C000124000", "D000123456", "X99"]
+
+
+def test_prefix_and_suffix_ranges():
+    search = ContainerSearch(KEYS)
+    assert search.prefix("C00012") == ["C000123456", "C000123457", "C000124000"]
+    assert search.prefix("C0001234", limit=1) == ["C000123456"]
+    assert search.suffix("123456") == ["C000123456", "D000123456"]
+    assert search.prefix("Z") == []
+    assert search.prefix("C000123456-TOO-LONG") == []
+
+
+def test_search_orders_edits_before_partials():
+    search = ContainerSearch(pd.Index(KEYS, dtype=object))
+    assert search.search(" c000123458 ") == [("C000123456", "1 edit"), ("C000123457", "1 edit")]
+    assert search.search("C00012400") == [("C000124000", "1 edit")]
+    assert ("C000124000", "prefix") in search.search("C0001")
+    # An exact match is not a candidate; short partials only match one edit away
+    assert ("X99", "1 edit") in search.search("X9")
+    assert "C000123456" not in dict(search.search("C000123456"))
+
+
+def test_non_ascii_query():
+    search = ContainerSearch(KEYS)
+    assert ("C000123456", "1 edit") in search.search("Ç000123456")
+    assert search.prefix("Ç") == []
+
+
+def test_stores_one_byte_per_character():
+    search = ContainerSearch(KEYS)
+    assert search.nbytes == 2 * len(KEYS) * max(len(key) for key in KEYS)
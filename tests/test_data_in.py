@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from Max.Max_Data_IN import (
+    allocate_cartons, allocate_invoice, build_container_map, get_final_df, merge_packing_lists,
+    normalize_packing_list,
+)
+from benchmarks.packing_list import make_packing_list
+from tests.reference import (
+    check_allocation, make_cartons, make_invoice, reference_container_map, reference_final_df,
+)
+
+
+@pytest.mark.parametrize("rows", [1, 50, 2000])
+def test_final_df_matches_reference(rows):
+    df = make_invoice(rows)
+    # Without a capacity every slot stays on one pallet, as the reference assumed
+    final_df = get_final_df(df, max_per_item=None)
+    expected = reference_final_df(df)
+    pd.testing.assert_frame_equal(final_df[expected.columns], expected)
+
+
+@pytest.mark.parametrize("rows", [1, 50, 2000])
+def test_container_map_matches_reference(rows):
+    df = make_invoice(rows)
+    container_map = build_container_map(df)
+    expected = reference_container_map(df)
+    assert container_map == expected
+    assert list(container_map) == list(expected)
+
+
+def test_final_df_splits_slots_over_capacity():
+    df = make_invoice(2000)
+    final_df = get_final_df(df, max_per_item=3)
+    assert final_df["Cartons"].max() <= 3
+    assert final_df["Cartons"].sum() == df[" CONTAINER_ID"].str.strip().nunique()
+    split = final_df[final_df["Scan_Carton_No"].str.contains("-")]
+    assert (split["Pallet_No"] >= 1).all()
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"weight": "WEIGHT", "max_weight": 120.0},
+    {"combine": True},
+])
+def test_allocation_invariants(options):
+    df = make_cartons(4, 500)
+    cartons, slots = allocate_cartons(df, 15, by="INV", **options)
+    check_allocation(cartons, slots, 15, options.get("max_weight"))
+
+
+def test_allocation_by_invoice_matches_per_invoice():
+    df = make_cartons(3, 500)
+    cartons, _ = allocate_cartons(df, 15, by="INV")
+    for inv in range(3):
+        rows = df[df["INV"] == inv].drop(columns=["INV", "VPNs_combined"])
+        per_invoice, _ = allocate_invoice(rows, 15)
+        expected = cartons.loc[cartons["INV"] == inv, "Scan_Carton_No"].to_numpy()
+        assert (per_invoice["Scan_Carton_No"].to_numpy() == expected).all()
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"max_weight": 100.0}, "max_weight needs a weight column"),
+    ({"max_weight": 100.0, "combine": True}, "max_weight needs a weight column"),
+    ({"combine": True}, "combine needs max_per_item or max_weight"),
+])
+def test_allocation_rejects_bad_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        allocate_cartons(make_cartons(1, 50), by="INV", **options)
+
+
+def test_merge_mixed_c_inv_types_as_text():
+    numeric = normalize_packing_list(make_packing_list(1, 20))
+    text = make_packing_list(1, 20, first_invoice=7000, seed=1)
+    text["C-INVC-NO"] = "INV-" + text["C-INVC-NO"].astype(str)
+    merged = merge_packing_lists([numeric, normalize_packing_list(text)])
+    assert sorted(merged["C-INVC-NO"].unique()) == ["5000", "INV-7000"]
+
+
+def test_merge_same_c_inv_types_keeps_dtype():
+    frames = [normalize_packing_list(make_packing_list(1, 20, first_invoice=n, seed=n)) for n in (5000, 6000)]
+    merged = merge_packing_lists(frames)
+    assert merged["C-INVC-NO"].dtype == frames[0]["C-INVC-NO"].dtype
+    assert len(merged) == sum(len(frame) for frame in frames)
@@ -0,0 +1,52 @@
+from openpyxl import Workbook
+
+from Max.Max_Data_IN import REQUIRED_COLUMNS
+from Max.Max_Excel_Ingest import stream_packing_list
+
+HEADER = ["C-INVC-NO", " CONTAINER_ID ", "ITEM", "VPN", "DIFF_1", "DIFF_2", "PRICE", "NOTES"]
+
+
+def write_workbook(path, sheets):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def test_projects_and_strips_the_data_sheet(tmp_path):
+    path = write_workbook(tmp_path / "list.xlsx", {"Data": [
+        HEADER,
+        [5000, " C1 ", "100001", "VPN1 ", "RED", None, 9.95, "fragile"],
+        [5000, "C2", "100002", "VPN1", "BLUE", "M", 9.95, None],
+    ]})
+    df = stream_packing_list(path, REQUIRED_COLUMNS)
+    assert df.columns.tolist() == REQUIRED_COLUMNS
+    assert df["CONTAINER_ID"].tolist() == ["C1", "C2"]
+    assert df["ITEM"].tolist() == [100001, 100002]
+    assert df["C-INVC-NO"].dtype == "int64"
+
+
+def test_skips_sheets_without_the_invoice_column(tmp_path):
+    path = write_workbook(tmp_path / "list.xlsx", {
+        "Data": [HEADER, [5000, "C1", "100001", "VPN1", "RED", None, 9.95, None]],
+        "Summary": [["CONTAINER_ID", "Cartons"], ["C1", 1], ["Total", 1]],
+        "More data": [HEADER, [5001, "C9", "100003", "VPN2", "RED", None, 4.95, None]],
+    })
+    df = stream_packing_list(path, REQUIRED_COLUMNS)
+    assert df["CONTAINER_ID"].tolist() == ["C1", "C9"]
+    assert df["C-INVC-NO"].tolist() == [5000, 5001]
+    assert df["C-INVC-NO"].dtype == "int64"
+
+
+def test_keeps_only_requested_invoices(tmp_path):
+    path = write_workbook(tmp_path / "list.xlsx", {"Data": [
+        HEADER,
+        [5000, "C1", "100001", "VPN1", "RED", None, 9.95, None],
+        [5001, "C2", "100002", "VPN1", "RED", None, 9.95, None],
+    ]})
+    df = stream_packing_list(path, REQUIRED_COLUMNS, c_invs=["5001"])
+    assert df["CONTAINER_ID"].tolist() == ["C2"]
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+from Max.Max_File_Cache import FileCache, FileMetadata, LocalFileClient
+
+FOLDER = "/sites/STNApplication/Shared Documents/Jeddah Fashion"
+PATH = f"{FOLDER}/supplier_packing_list_out.xlsx"
+
+
+class StubClient:
+    """In-memory stand-in for SharePointClient that counts server calls."""
+
+    def __init__(self):
+        self.files = {}
+        self.metadata_calls = 0
+        self.list_calls = 0
+        self.downloads = []
+        self.offline = False
+
+    def put(self, path, content, etag="", last_modified="t0"):
+        self.files[path] = (content, FileMetadata(etag or None, last_modified, len(content)))
+
+    def get_metadata(self, path):
+        self.metadata_calls += 1
+        if self.offline:
+            raise ConnectionError("SharePoint unreachable")
+        return self.files[path][1]
+
+    def download(self, path, file_object):
+        self.downloads.append(path)
+        file_object.write(self.files[path][0])
+
+    def list_files(self, folder):
+        self.list_calls += 1
+        if self.offline:
+            raise ConnectionError("SharePoint unreachable")
+        return {path: metadata for path, (_, metadata) in self.files.items() if path.startswith(folder)}
+
+
+@pytest.fixture
+def client():
+    return StubClient()
+
+
+def make_cache(client, tmp_path, ttl=0, created=None):
+    def factory():
+        if created is not None:
+            created.append(1)
+        return client
+    return FileCache(factory, str(tmp_path / "cache"), ttl, workers=2)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_fresh_copy_skips_the_server_within_ttl(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    created = []
+    make_cache(client, tmp_path, ttl=60).fetch(PATH)
+
+    # A new cache object (a new process) reuses the on-disk copy and never authenticates
+    local_path, version = make_cache(client, tmp_path, ttl=60, created=created).fetch(PATH)
+    assert read(local_path) == b"v1"
+    assert version == "e1"
+    assert (client.metadata_calls, client.downloads, created) == (1, [PATH], [])
+
+
+def test_unchanged_file_is_not_downloaded_again(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    cache = make_cache(client, tmp_path)
+    first = cache.fetch(PATH)
+    assert cache.fetch(PATH) == first
+    assert client.metadata_calls == 2
+    assert client.downloads == [PATH]
+
+
+def test_keeps_the_source_extension(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    local_path, _ = make_cache(client, tmp_path).fetch(PATH)
+    assert local_path.endswith(".xlsx")
+
+
+def test_changed_etag_downloads_again(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    cache = make_cache(client, tmp_path)
+    cache.fetch(PATH)
+    client.put(PATH, b"v2", etag="e2")
+    local_path, version = cache.fetch(PATH)
+    assert (read(local_path), version) == (b"v2", "e2")
+    assert client.downloads == [PATH, PATH]
+
+
+def test_changed_size_downloads_again_without_an_etag(client, tmp_path):
+    client.put(PATH, b"v1", last_modified="t0")
+    cache = make_cache(client, tmp_path)
+    _, before = cache.fetch(PATH)
+    client.put(PATH, b"longer", last_modified="t0")
+    local_path, after = cache.fetch(PATH)
+    assert read(local_path) == b"longer"
+    assert before != after
+    assert len(client.downloads) == 2
+
+
+def test_serves_the_last_good_copy_when_the_server_fails(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    cache = make_cache(client, tmp_path)
+    cache.fetch(PATH)
+    client.offline = True
+    local_path, version = cache.fetch(PATH)
+    assert (read(local_path), version) == (b"v1", "e1")
+
+
+def test_server_failure_without_a_copy_raises(client, tmp_path):
+    client.put(PATH, b"v1", etag="e1")
+    client.offline = True
+    with pytest.raises(ConnectionError):
+        make_cache(client, tmp_path).fetch(PATH)
+
+
+def test_folder_downloads_only_changed_workbooks(client, tmp_path):
+    for name in ("a.xlsx", "b.XLSX"):
+        client.put(f"{FOLDER}/{name}", name.encode(), etag=f"{name}-1")
+    client.put(f"{FOLDER}/notes.txt", b"notes", etag="n1")
+    client.put(f"{FOLDER}/~$a.xlsx", b"lock", etag="l1")
+    cache = make_cache(client, tmp_path)
+
+    fetched = cache.fetch_folder(FOLDER)
+    assert sorted(fetched) == [f"{FOLDER}/a.xlsx", f"{FOLDER}/b.XLSX"]
+    assert sorted(client.downloads) == sorted(fetched)
+
+    client.downloads.clear()
+    client.put(f"{FOLDER}/b.XLSX", b"b changed", etag="b-2")
+    fetched = cache.fetch_folder(FOLDER)
+    assert client.downloads == [f"{FOLDER}/b.XLSX"]
+    assert read(fetched[f"{FOLDER}/b.XLSX"][0]) == b"b changed"
+    assert fetched[f"{FOLDER}/a.xlsx"][1] == "a.xlsx-1"
+
+
+def test_folder_listing_within_ttl_and_offline(client, tmp_path):
+    client.put(f"{FOLDER}/a.xlsx", b"a", etag="a1")
+    first = make_cache(client, tmp_path, ttl=60).fetch_folder(FOLDER)
+    assert make_cache(client, tmp_path, ttl=60).fetch_folder(FOLDER) == first
+    assert client.list_calls == 1
+
+    client.offline = True
+    assert make_cache(client, tmp_path).fetch_folder(FOLDER) == first
+
+
+def test_local_client_versions_follow_the_file(tmp_path):
+    root = tmp_path / "sharepoint"
+    root.mkdir()
+    (root / "supplier_packing_list_out.xlsx").write_bytes(b"v1")
+    cache = FileCache(lambda: LocalFileClient(str(root)), str(tmp_path / "cache"), 0)
+
+    _, before = cache.fetch(PATH)
+    os.utime(root / "supplier_packing_list_out.xlsx", ns=(0, 10**18))
+    local_path, after = cache.fetch(PATH)
+    assert before != after
+    assert read(local_path) == b"v1"
+    assert list(LocalFileClient(str(root)).list_files(FOLDER)) == [PATH]
@@ -0,0 +1,131 @@
+import http.client
+import json
+import socket
+
+import pytest
+
+from Max.Max_Scan_Engine import ScanEngine, ScanServer
+
+
+def first_code(snapshot, c_inv):
+    return snapshot.get_invoice(c_inv).scan_index.keys[0]
+
+
+def test_scan_counts_duplicates_and_records_to_ledger(store, snapshot, ledger):
+    engine = ScanEngine(store, ledger)
+    c_inv = snapshot.c_inv_list[0]
+    code = first_code(snapshot, c_inv)
+
+    result = engine.scan("s1", c_inv, code)
+    assert result.status == f"Pallet - {result.pallet}"
+    assert not result.duplicate
+    again = engine.scan("s1", c_inv, code.lower())
+    assert again.duplicate
+    assert again.status.endswith("(DUPLICATE)")
+
+    progress = engine.progress(snapshot, c_inv)
+    assert (progress.total_scanned, progress.total_duplicates) == (1, 1)
+    assert [entry.code for entry in ledger.recent("s1", c_inv, 5)] == [code, code]
+
+
+def test_scan_outside_the_invoice(store, snapshot):
+    engine = ScanEngine(store)
+    first, second = snapshot.c_inv_list[:2]
+    code = first_code(snapshot, second)
+
+    result = engine.scan("s1", first, code)
+    assert result.status_type == "warning"
+    assert result.suggested_c_inv == second
+    switched = engine.scan("s1", first, code, auto_switch=True)
+    assert switched.c_inv == second
+    assert switched.status_type == "success"
+    assert engine.scan("s1", first, "").status == "EMPTY SCAN"
+
+
+def test_mismatch_offers_candidates(store, snapshot):
+    engine = ScanEngine(store)
+    c_inv = snapshot.c_inv_list[0]
+    code = first_code(snapshot, c_inv)
+
+    result = engine.scan("s1", c_inv, code[:-1])
+    assert result.status_type == "danger"
+    assert code in [candidate.code for candidate in result.candidates]
+
+
+def test_progress_resumes_from_the_ledger(store, snapshot, ledger):
+    c_inv = snapshot.c_inv_list[0]
+    ScanEngine(store, ledger).scan("s1", c_inv, first_code(snapshot, c_inv))
+    assert ScanEngine(store, ledger).progress(snapshot, c_inv).total_scanned == 1
+
+
+def test_stations_on_old_and_new_snapshots_share_counts(store, snapshot, packing_list, ledger):
+    engine = ScanEngine(store, ledger)
+    c_inv = snapshot.c_inv_list[0]
+    codes = snapshot.get_invoice(c_inv).scan_index.keys[:3].tolist()
+    engine.scan("old", c_inv, codes[0], snapshot=snapshot)
+
+    # Drop one row of the invoice so its fingerprint changes
+    changed = packing_list.drop(packing_list.index[packing_list["C-INVC-NO"] == c_inv][-1])
+    new = store.swap(changed, "v2")
+    assert new.fingerprints[c_inv] != snapshot.fingerprints[c_inv]
+
+    engine.scan("new", c_inv, codes[1], snapshot=new)
+    engine.scan("old", c_inv, codes[2], snapshot=snapshot)
+    old_progress = engine.progress(snapshot, c_inv)
+    new_progress = engine.progress(new, c_inv)
+    assert old_progress is not new_progress
+    assert old_progress.total_scanned == new_progress.total_scanned == 3
+    assert engine.scan("new", c_inv, codes[2], snapshot=new).duplicate
+
+
+def test_progress_seed_resolves_against_the_new_rows(store, snapshot, packing_list, ledger):
+    engine = ScanEngine(store, ledger)
+    first, second = snapshot.c_inv_list[:2]
+    code = first_code(snapshot, first)
+    pallet = engine.scan("s1", first, code, snapshot=snapshot).pallet
+
+    # The scanned carton moves to another invoice
+    moved = packing_list.copy()
+    moved.loc[moved["CONTAINER_ID"] == code, "C-INVC-NO"] = second
+    new = store.swap(moved, "v2")
+    assert new.get_invoice(first).scan_index.lookup(code) is None
+
+    progress = engine.progress(new, first)
+    assert progress.total_scanned == 0
+    assert progress.scanned.get(pallet, 0) == 0
+    assert progress.total_remaining == progress.total_expected
+
+
+def test_server_start_raises_when_the_port_is_taken(store):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        server = ScanServer(ScanEngine(store), "127.0.0.1", taken.getsockname()[1])
+        with pytest.raises(OSError):
+            server.start()
+    server._thread.join(1)
+    assert not server._thread.is_alive()
+
+
+def test_server_scans_over_http(store, snapshot):
+    server = ScanServer(ScanEngine(store), "127.0.0.1", 0).start()
+    first, second = snapshot.c_inv_list[:2]
+    code = first_code(snapshot, second)
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    try:
+        for body, status in [
+            ({"c_inv": str(first), "code": code, "auto_switch": True}, 200),
+            (["not", "an", "object"], 400),
+            ({"c_inv": "NOPE", "code": code}, 404),
+        ]:
+            conn.request("POST", "/scan", json.dumps(body))
+            response = conn.getresponse()
+            response.read()
+            assert response.status == status
+        conn.request("POST", "/scan", json.dumps({"c_inv": str(first), "code": code, "auto_switch": True}))
+        payload = json.loads(conn.getresponse().read())
+        assert payload["c_inv"] == second
+        assert payload["duplicate"]
+    finally:
+        conn.close()
+        server.stop()
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from Max.Max_Scan_Ledger import ScanLedger
+
+
+def test_recent_is_newest_first_per_station_and_invoice(ledger):
+    for i in range(5):
+        ledger.append("s1", 5000, f"C{i}", "1.1", "Pallet - 1.1", "success")
+    ledger.append("s2", 5000, "OTHER", None, "MISMATCH", "danger")
+    ledger.append("s1", 5001, "ELSEWHERE", None, "MISMATCH", "danger")
+
+    recent = ledger.recent("s1", 5000, 3)
+    assert [entry.code for entry in recent] == ["C4", "C3", "C2"]
+    assert recent[0].c_inv == "5000"
+    assert recent[0].pallet == "1.1"
+    assert [entry.code for entry in ledger.history("s1", 5000)] == [f"C{i}" for i in range(5)]
+    assert len(ledger.invoice_history(5000)) == 6
+
+
+def test_missing_pallet_stays_missing(ledger):
+    ledger.append("s1", 5000, "ZZZ", None, "MISMATCH: ZZZ not found", "danger")
+    (entry,) = ledger.recent("s1", 5000, 1)
+    assert entry.pallet is None
+    assert entry.status_type == "danger"
+
+
+def test_read_after_append_does_not_wait_for_group_commit(tmp_path):
+    ledger = ScanLedger(str(tmp_path / "ledger.sqlite3"), flush_interval=5)
+    try:
+        ledger.append("s1", 5000, "C1", "1.1", "Pallet - 1.1", "success")
+        start = time.perf_counter()
+        assert [entry.code for entry in ledger.recent("s1", 5000, 1)] == ["C1"]
+        assert time.perf_counter() - start < 1
+    finally:
+        ledger.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    ledger = ScanLedger(path)
+    for i in range(1200):
+        ledger.append("s1", 5000, f"C{i}", "1.1", "Pallet - 1.1", "success")
+    ledger.close()
+
+    reopened = ScanLedger(path)
+    try:
+        assert len(reopened.invoice_history(5000)) == 1200
+        assert reopened.recent("s1", 5000, 1)[0].code == "C1199"
+    finally:
+        reopened.close()
+
+
+def test_flush_after_close_returns(tmp_path):
+    ledger = ScanLedger(str(tmp_path / "ledger.sqlite3"))
+    ledger.close()
+    thread = threading.Thread(target=ledger.flush)
+    thread.start()
+    thread.join(2)
+    assert not thread.is_alive()